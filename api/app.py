@@ -1,10 +1,51 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+import boto3
+import botocore
+from dotenv import load_dotenv
+import os
+
 from api.upload import upload_router
 from api.ticket import ticket_router
 from api.departments import department_router
+from worker.utils.redis_client import get_async_redis, check_health_async, close_async_pools
+from worker.utils.local_cache import start_listener
+
+load_dotenv()
+
+BUCKET = os.getenv("AWS_BUCKET", "ticketmaster")
+
+
+def ensure_bucket(s3):
+    try:
+        s3.head_bucket(Bucket=BUCKET)
+    except botocore.exceptions.ClientError:
+        s3.create_bucket(Bucket=BUCKET)
+
+
+# Clients are built once per API process and shared by every request;
+# blocking S3 calls are pushed to the threadpool so they never stall the loop.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.redis = get_async_redis("metadata")
+    await check_health_async()
+    await run_in_threadpool(start_listener)
+    app.state.s3 = boto3.client(
+        "s3",
+        endpoint_url=os.getenv("AWS_ENDPOINT_URL"),
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        region_name=os.getenv("AWS_REGION_NAME")
+    )
+    app.state.bucket = BUCKET
+    await run_in_threadpool(ensure_bucket, app.state.s3)
+    yield
+    await close_async_pools()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(upload_router, prefix="/upload")
 app.include_router(ticket_router, prefix="/tickets")
-app.include_router(department_router, prefix="/departments")
\ No newline at end of file
+app.include_router(department_router, prefix="/departments")
@@ -1,23 +1,20 @@
-import redis
-from fastapi import APIRouter, HTTPException
-from dotenv import load_dotenv
-import os
+from fastapi import APIRouter, HTTPException, Request
 from api.models.DepartmentResponse import DepartmentResponse
-
-load_dotenv()
+from worker.utils.local_cache import cache_get, cache_set
 
 department_router = APIRouter()
-REDIS_URL = os.getenv("REDIS_HOST", "redis://localhost:6379/2")
 
 @department_router.get("/",response_model=DepartmentResponse)
-async def get_departments():
+async def get_departments(request: Request):
     try:
-        redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-        departments = redis_client.smembers("departments")
+        departments = cache_get("departments", "all")
+        if departments is None:
+            departments = list(await request.app.state.redis.smembers("departments"))
+            cache_set("departments", "all", departments)
 
         if not departments:
             raise HTTPException(status_code=404, detail="Departments not found")
 
-        return {"departments": list(departments)}
+        return {"departments": departments}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,43 @@
+import time
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from worker.data_transformation.create_embeddings import build_texts
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+DATA = Path(__file__).resolve().parents[1] / "data" / "employees_data.csv"
+
+
+def build_texts_iterrows(df):
+    texts = []
+    metadata = []
+    for _, row in df.iterrows():
+            texts.append(", ".join(f"{col}: {val}" for col, val in row.items()))
+            metadata.append(row.to_dict())
+    return texts, metadata
+
+
+def timed(fn, df):
+    start = time.perf_counter()
+    result = fn(df)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    base = pd.read_csv(DATA)
+    df = pd.concat([base] * (ROWS // len(base) + 1), ignore_index=True).iloc[:ROWS]
+
+    (old_texts, old_meta), old_time = timed(build_texts_iterrows, df)
+    (new_texts, new_meta), new_time = timed(build_texts, df)
+
+    assert old_texts == new_texts, "text serialization changed"
+    assert old_meta == new_meta, "metadata changed"
+
+    print(f"rows: {len(df)}")
+    print(f"iterrows:   {old_time:.3f}s")
+    print(f"vectorized: {new_time:.3f}s")
+    print(f"speedup:    {old_time / new_time:.1f}x")
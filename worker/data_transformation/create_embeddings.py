@@ -1,29 +1,72 @@
 from worker.worker import app
+from worker.utils.models import get_model
+from worker.utils.blob_store import put_blob, get_blob, delete_blob
+from worker.utils.serializer import dumps, loads
+from worker.utils.skill_aliases import canonical_terms
 import pandas as pd
-from sentence_transformers import SentenceTransformer
-from pathlib import Path
+import numpy as np
+import io
+
+BATCH_SIZE = 50
+SKILL_COLUMNS = ("Primary skills", "Secondary skills")
+
+# Every column is read as text. Letting pandas guess per file (or per stream
+# chunk) turns "5" into "5.0" as soon as one cell in the column is blank,
+# which would change the embedding text and content hash of every row.
+def read_csv(source, **kwargs):
+    return pd.read_csv(source, dtype=str, **kwargs)
+
+def build_texts(df):
+    # Works column by column: each column is formatted once as "col: val"
+    # and the rows are joined in column order, so the text is identical to
+    # the old per-row join without building a Series per row.
+    # Skill synonyms are canonicalized in the text only; metadata keeps the
+    # skills as uploaded.
+    columns = list(df.columns)
+    values = [df[col].tolist() for col in columns]
+    formatted = [
+        [f"{col}: {', '.join(canonical_terms(val)) if col in SKILL_COLUMNS else val}" for val in vals]
+        for col, vals in zip(columns, values)
+    ]
+    texts = list(map(", ".join, zip(*formatted)))
+    metadata = [dict(zip(columns, row)) for row in zip(*values)]
+    return texts, metadata
+
+def pack_embeddings(embeddings, texts, metadata):
+    return dumps({
+        "embeddings": np.asarray(embeddings, dtype=np.float32),
+        "texts": texts,
+        "metadata": metadata,
+    })
+
+def unpack_embeddings(data):
+    payload = loads(data)
+    return payload["embeddings"], payload["texts"], payload["metadata"]
+
+def read_frame(blob_key):
+    return read_csv(io.BytesIO(get_blob(blob_key)))
+
+def embed_frame(df):
+    texts, metadata = build_texts(df)
+    if not texts:
+        print("No new or changed rows, skipping embedding.")
+        return [], texts, metadata
+    model = get_model()
+    embeddings = model.encode(texts, show_progress_bar=True, batch_size=BATCH_SIZE)
+    return embeddings, texts, metadata
 
 @app.task
-def create_embeddings(file_path):
+def create_embeddings(blob_key):
     try:
-        print(f"Creating embeddings for file: {file_path}")
-        df = pd.read_csv(file_path)
-
-        texts = []
-        metadata = []
-        for _, row in df.iterrows():
-                texts.append(", ".join(f"{col}: {val}" for col, val in row.items()))
-                metadata.append(row.to_dict())
-
-        model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-        embeddings = model.encode(texts, show_progress_bar=True, batch_size=50)
-        embeddings = embeddings.tolist()
-
-        file = Path(file_path)
-        if file.exists():
-            file.unlink()
+        print(f"Creating embeddings for blob: {blob_key}")
+        df = read_frame(blob_key)
+
+        embeddings, texts, metadata = embed_frame(df)
+
+        payload_key = put_blob(pack_embeddings(embeddings, texts, metadata), "embeddings")
+        delete_blob(blob_key)
         print(f"Processed {len(df)} rows and created embeddings.")
-        return embeddings,texts,metadata
+        return payload_key
     except Exception as e:
         print(f"Error creating embeddings: {e}")
-        raise e
\ No newline at end of file
+        raise e
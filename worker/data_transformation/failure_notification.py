@@ -3,7 +3,7 @@ import smtplib
 from email.mime.text import MIMEText
 from dotenv import load_dotenv
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
+from worker.utils.llm import complete
 
 load_dotenv()
 
@@ -14,11 +14,6 @@ def failure_notification(self, task_id, email=None):
         exc = result.result
         traceback = result.traceback
 
-        llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            temperature=0.0
-        )
-
         prompt = f"""
         Summarize this error in 2-3 lines max.
         Focus on root cause only.
@@ -30,7 +25,7 @@ def failure_notification(self, task_id, email=None):
         {traceback}
         """
 
-        summary = llm.invoke(prompt).content.strip()
+        summary = complete("error_summary", prompt, cache=False).strip()
 
         message = f"""
 Task failed: {task_id}
@@ -0,0 +1,37 @@
+from celery import chain
+from dotenv import load_dotenv
+import os
+
+from worker.data_transformation.process_file import process_file
+from worker.data_transformation.create_embeddings import create_embeddings
+from worker.data_transformation.store_embeddings import store_embeddings
+from worker.data_transformation.stream_ingest import stream_ingest
+from worker.data_transformation.shard_embeddings import shard_embeddings
+from worker.data_transformation.send_notification import send_notification
+
+load_dotenv()
+
+# "chain" runs process -> embed -> store as separate tasks,
+# "stream" runs the whole ingest as one chunk-pipelined task,
+# "sharded" fans embed + store out over a chord of shard tasks.
+INGEST_MODE = os.getenv("INGEST_MODE", "chain")
+
+
+def upload_pipeline(file_path, email):
+    if INGEST_MODE == "stream":
+        return chain(
+            stream_ingest.s(file_path),
+            send_notification.s(email)
+        )
+    if INGEST_MODE == "sharded":
+        return chain(
+            process_file.s(file_path),
+            shard_embeddings.s(),
+            send_notification.s(email)
+        )
+    return chain(
+        process_file.s(file_path),
+        create_embeddings.s(),
+        store_embeddings.s(),
+        send_notification.s(email)
+    )
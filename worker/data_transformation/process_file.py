@@ -1,8 +1,10 @@
 from worker.worker import app
-import pandas as pd
 import boto3
 import os
-import redis
+from worker.data_transformation.create_embeddings import build_texts, read_csv
+from worker.data_transformation.store_embeddings import changed_rows
+from worker.utils.redis_client import get_redis
+from worker.utils.blob_store import put_blob
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -26,7 +28,7 @@ def process_file(file_path):
         )
 
         obj = s3.get_object(Bucket=os.getenv("AWS_BUCKET"), Key=file_path)
-        df = pd.read_csv(obj["Body"])
+        df = read_csv(obj["Body"])
 
         missing_columns = check_columns(df)
         if missing_columns:
@@ -34,22 +36,25 @@ def process_file(file_path):
 
         print(f"Initial number of rows: {len(df)}")
         df.dropna(inplace=True)
+        # Rows are keyed by Employee ID; the last row for an employee wins.
+        df.drop_duplicates("Employee ID", keep="last", inplace=True)
         print(f"Number of rows after processing: {len(df)}")
 
         departments = df["Department"].unique()
 
-        redis_client = redis.from_url(
-            os.getenv("REDIS_HOST", "redis://localhost:6379/1"),
-            decode_responses=True
-        )       
+        redis_client = get_redis("metadata")
 
         if not redis_client.exists("departments"):
             print("Creating departments set in Redis")
 
         redis_client.sadd("departments", *departments)
 
-        df.to_csv(file_path, index=False)
-        return file_path
+        vector_client = get_redis("vector")
+        texts, metadata = build_texts(df)
+        df = df[changed_rows(vector_client, texts, metadata)]
+        print(f"Number of new or changed rows: {len(df)}")
+
+        return put_blob(df.to_csv(index=False).encode("utf-8"), "csv")
 
     except Exception as e:
         print(f"Processing failed: {e}")
@@ -0,0 +1,57 @@
+from worker.worker import app
+from worker.data_transformation.create_embeddings import read_frame, embed_frame
+from worker.data_transformation.store_embeddings import store_rows, prepare_store, finish_ingest
+from worker.utils.blob_store import put_blob, delete_blob
+from worker.utils.models import get_model
+from worker.utils.redis_client import get_redis
+from celery import chord, group
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+SHARD_ROWS = int(os.getenv("INGEST_SHARD_ROWS", "1000"))
+
+@app.task(bind=True)
+def shard_embeddings(self, blob_key):
+    try:
+        df = read_frame(blob_key)
+        if len(df):
+            prepare_store(get_redis("vector", decode_responses=False), get_model().get_sentence_embedding_dimension())
+        shard_keys = [
+            put_blob(df.iloc[start:start + SHARD_ROWS].to_csv(index=False).encode("utf-8"), "csv")
+            for start in range(0, len(df), SHARD_ROWS)
+        ]
+        delete_blob(blob_key)
+    except Exception as e:
+        print(f"Error sharding embeddings: {e}")
+        raise e
+
+    if not shard_keys:
+        return "No changed rows to store, embeddings are up to date."
+
+    # replace() raises to hand the rest of the chain over to the chord.
+    print(f"Fanning out {len(df)} rows into {len(shard_keys)} shards")
+    raise self.replace(chord(
+        group(embed_shard.s(key) for key in shard_keys),
+        aggregate_shards.s()
+    ))
+
+@app.task
+def embed_shard(blob_key):
+    try:
+        df = read_frame(blob_key)
+        embeddings, texts, metadata = embed_frame(df)
+        stored = store_rows(embeddings, texts, metadata)
+        delete_blob(blob_key)
+        print(f"Shard {blob_key}: stored {stored} embeddings")
+        return stored
+    except Exception as e:
+        print(f"Error embedding shard {blob_key}: {e}")
+        raise e
+
+@app.task
+def aggregate_shards(counts):
+    if sum(counts):
+        finish_ingest(get_redis("vector", decode_responses=False))
+    return f"Stored {sum(counts)} embeddings successfully across {len(counts)} shards."
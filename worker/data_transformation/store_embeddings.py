@@ -1,61 +1,89 @@
 from worker.worker import app
-import uuid
 import numpy as np
-import os
-import redis
-from redis.commands.search.field import VectorField, TextField
-from redis.commands.search.index_definition import IndexDefinition, IndexType
+from worker.data_transformation.create_embeddings import unpack_embeddings
+from worker.utils.blob_store import get_blob, delete_blob
+from worker.utils.redis_client import get_redis
+from worker.utils import vocabulary
+from worker.utils.local_cache import bump_generation
+from worker.utils.skills import publish_index
+from worker.utils.employee_schema import to_hash, employee_key, content_hash
+from worker.utils.employee_index import ensure_index
 from dotenv import load_dotenv
-import json
 
 load_dotenv()
 
-REDIS_URL = os.getenv("REDIS_VECTOR_URL", "redis://localhost:6379/2")
-INDEX_NAME = "employee_embeddings"
+
+# One-time setup for ingests that write from several tasks at once: the index
+# and the vocabulary must exist before the writers start, otherwise each
+# writer races to create the index and to rebuild the vocabulary.
+def prepare_store(redis_client, dim):
+    ensure_index(dim)
+    vocabulary.ensure_built(redis_client)
+
+def changed_rows(redis_client, texts, metadata):
+    # Legacy hashes are migrated first so their rows compare as unchanged
+    # instead of being embedded again.
+    ensure_index()
+    pipe = redis_client.pipeline(transaction=False)
+    for meta in metadata:
+        pipe.hget(employee_key(meta), "content_hash")
+    stored = pipe.execute()
+
+    changed = []
+    for old, txt in zip(stored, texts):
+        if isinstance(old, bytes):
+            old = old.decode("utf-8")
+        changed.append(old != content_hash(txt))
+    return changed
+
+def write_embeddings(redis_client, embeddings, texts, metadata):
+    # Built before the rows change, so the deltas below land on top of a
+    # complete vocabulary rather than racing a rebuild.
+    vocabulary.ensure_built(redis_client)
+    previous = vocabulary.stored_rows(redis_client, [employee_key(meta) for meta in metadata])
+
+    pipe = redis_client.pipeline()
+    for emb, txt, meta in zip(embeddings, texts, metadata):
+        pipe.hset(
+            employee_key(meta),
+            mapping={
+                "embedding": np.array(emb, dtype=np.float32).tobytes(),
+                "text": txt,
+                "content_hash": content_hash(txt),
+                **to_hash(meta),
+            },
+        )
+    pipe.execute()
+
+    vocabulary.apply_changes(redis_client, previous, [vocabulary.row_fields(meta) for meta in metadata])
+
+# Runs once when an ingest has written all of its rows (not per chunk or
+# shard): republishes the skill index and bumps the dataset generation, which
+# makes every process drop its caches.
+def finish_ingest(redis_client):
+    publish_index(redis_client)
+    bump_generation()
+
+def store_rows(embeddings, texts, metadata):
+    if not texts:
+        return 0
+    print(f"Storing {len(embeddings)} embeddings in ChromaDB...")
+
+    redis_client = get_redis("vector", decode_responses=False)
+
+    ensure_index(len(embeddings[0]))
+    write_embeddings(redis_client, embeddings, texts, metadata)
+    return len(texts)
 
 @app.task
-def store_embeddings(data):
+def store_embeddings(blob_key):
     try:
-        embeddings,texts,metadata = data
-        print(f"Storing {len(embeddings)} embeddings in ChromaDB...")
-
-        redis_client = redis.from_url(REDIS_URL, decode_responses=False)
-
-        try:
-            redis_client.ft(INDEX_NAME).info()
-        except:
-            schema = (
-                TextField("text"),
-                TextField("department"),
-                TextField("metadata"),
-                VectorField(
-                    "embedding",
-                    "HNSW",
-                    {
-                        "TYPE": "FLOAT32",
-                        "DIM": len(embeddings[0]),
-                        "DISTANCE_METRIC": "COSINE"
-                    },
-                ),
-            )
-            redis_client.ft(INDEX_NAME).create_index(
-                schema,
-                definition=IndexDefinition(prefix=["emp:"], index_type=IndexType.HASH),
-            )
-
-        pipe = redis_client.pipeline()
-        for emb, txt, meta in zip(embeddings, texts, metadata):
-            key = f"emp:{uuid.uuid4()}"
-            pipe.hset(
-                key,
-                mapping={
-                    "embedding": np.array(emb, dtype=np.float32).tobytes(),
-                    "text": txt,
-                    "department": meta.get("Department", ""),
-                    "metadata": json.dumps(meta),
-                },
-            )
-        pipe.execute()
+        embeddings,texts,metadata = unpack_embeddings(get_blob(blob_key))
+        stored = store_rows(embeddings, texts, metadata)
+        delete_blob(blob_key)
+        if not stored:
+            return "No changed rows to store, embeddings are up to date."
+        finish_ingest(get_redis("vector", decode_responses=False))
 
         return f"Stored {len(texts)} embeddings successfully." 
     except Exception as e:
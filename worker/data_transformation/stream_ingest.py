@@ -0,0 +1,157 @@
+from worker.worker import app
+from worker.data_transformation.process_file import check_columns
+from worker.data_transformation.create_embeddings import build_texts, read_csv, BATCH_SIZE
+from worker.data_transformation.store_embeddings import ensure_index, write_embeddings, changed_rows, finish_ingest
+from worker.utils.models import get_model
+from worker.utils.redis_client import get_redis
+import boto3
+import os
+import queue
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "2000"))
+QUEUE_DEPTH = int(os.getenv("INGEST_QUEUE_DEPTH", "4"))
+
+_DONE = object()
+
+
+def _put(q, item, stop):
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def _stage(target, errors, stop, out_q):
+    def run():
+        try:
+            target()
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            if out_q is not None:
+                _put(out_q, _DONE, stop)
+    return threading.Thread(target=run, daemon=True)
+
+
+@app.task
+def stream_ingest(file_path):
+    try:
+        print(f"Streaming file: {file_path} in chunks of {CHUNK_ROWS} rows")
+
+        s3 = boto3.client(
+            "s3",
+            endpoint_url=os.getenv("AWS_ENDPOINT_URL"),
+            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+            region_name=os.getenv("AWS_REGION_NAME")
+        )
+        metadata_client = get_redis("metadata")
+        vector_client = get_redis("vector", decode_responses=False)
+        model = get_model()
+
+        raw_q = queue.Queue(maxsize=QUEUE_DEPTH)
+        text_q = queue.Queue(maxsize=QUEUE_DEPTH)
+        write_q = queue.Queue(maxsize=QUEUE_DEPTH)
+        stop = threading.Event()
+        errors = []
+        counts = {"read": 0, "kept": 0, "stored": 0}
+        hash_client = get_redis("vector")
+
+        def read():
+            obj = s3.get_object(Bucket=os.getenv("AWS_BUCKET"), Key=file_path)
+            for chunk in read_csv(obj["Body"], chunksize=CHUNK_ROWS):
+                if not _put(raw_q, chunk, stop):
+                    return
+
+        def validate():
+            while True:
+                chunk = _get(raw_q, stop)
+                if chunk is _DONE:
+                    return
+                missing_columns = check_columns(chunk)
+                if missing_columns:
+                    raise ValueError(f"CSV file is missing required columns: {missing_columns}")
+                counts["read"] += len(chunk)
+                # The last row for an employee wins within a chunk; chunks
+                # are written in file order.
+                chunk = chunk.dropna().drop_duplicates("Employee ID", keep="last")
+                if chunk.empty:
+                    continue
+                counts["kept"] += len(chunk)
+                metadata_client.sadd("departments", *chunk["Department"].unique())
+                texts, metadata = build_texts(chunk)
+                changed = changed_rows(hash_client, texts, metadata)
+                texts = [t for t, c in zip(texts, changed) if c]
+                metadata = [m for m, c in zip(metadata, changed) if c]
+                if not texts:
+                    continue
+                if not _put(text_q, (texts, metadata), stop):
+                    return
+
+        def write():
+            index_ready = False
+            while True:
+                item = _get(write_q, stop)
+                if item is _DONE:
+                    return
+                embeddings, texts, metadata = item
+                if not index_ready:
+                    ensure_index(embeddings.shape[1])
+                    index_ready = True
+                write_embeddings(vector_client, embeddings, texts, metadata)
+                counts["stored"] += len(texts)
+
+        reader = _stage(read, errors, stop, raw_q)
+        validator = _stage(validate, errors, stop, text_q)
+        writer = _stage(write, errors, stop, None)
+        for thread in (reader, validator, writer):
+            thread.start()
+
+        # Embedding stays on the task thread; the encoder releases the GIL so
+        # download, validation and Redis writes keep running around it.
+        try:
+            while True:
+                item = _get(text_q, stop)
+                if item is _DONE:
+                    break
+                texts, metadata = item
+                embeddings = model.encode(texts, show_progress_bar=False, batch_size=BATCH_SIZE)
+                if not _put(write_q, (embeddings, texts, metadata), stop):
+                    break
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(write_q, _DONE, stop)
+
+        for thread in (reader, validator, writer):
+            thread.join()
+
+        if errors:
+            raise errors[0]
+        if counts["stored"]:
+            finish_ingest(vector_client)
+
+        print(f"Streamed {counts['read']} rows, kept {counts['kept']}, stored {counts['stored']} new or changed embeddings.")
+        return f"Stored {counts['stored']} embeddings successfully."
+
+    except Exception as e:
+        print(f"Streaming ingest failed: {e}")
+        raise e
@@ -0,0 +1,31 @@
+from worker.worker import app
+from worker.query_transformation.metadata_extractor import extract_metadata
+from worker.query_transformation.query_parser import query_parser
+from worker.query_transformation.retrieve_chunks import retrieve_chunks
+from worker.query_transformation.generate_answer import generate_answer
+import time
+
+
+def _timed(timings, name, stage, *args):
+    start = time.perf_counter()
+    result = stage(*args)
+    timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+# Runs every stage in this process: calling a task object directly executes
+# its body locally, so there is no broker hop or result-backend write between
+# stages and cached models/clients are reused.
+@app.task
+def assign_ticket(query, department):
+    try:
+        timings = {}
+        data = _timed(timings, "extract_metadata", extract_metadata, query, department)
+        data = _timed(timings, "query_parser", query_parser, data)
+        data = _timed(timings, "retrieve_chunks", retrieve_chunks, data)
+        employee = _timed(timings, "generate_answer", generate_answer, data)
+        print(f"Fused ticket pipeline stage timings (ms): {timings}")
+        return employee
+    except Exception as e:
+        print(f"Fused ticket pipeline failed: {e}")
+        raise e
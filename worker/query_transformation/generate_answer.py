@@ -1,5 +1,7 @@
 from worker.worker import app
-from langchain_google_genai import ChatGoogleGenerativeAI
+from worker.utils.llm import complete
+from worker.utils.candidates import ranked_candidates
+from worker.utils.prompt_budget import fit_ticket, fit_candidates
 import json
 
 @app.task
@@ -7,20 +9,22 @@ def generate_answer(data):
     try:
         query,top_chunks = data
         print(f"Generating answer for query: {query}")
+        candidates = fit_candidates("answer", top_chunks)
+        ticket = fit_ticket("answer", query)
         prompt = f'''
         You are a **final decision engine** inside a production ticket-assignment RAG pipeline. Your job is to select the single best employee who can most confidently resolve the user’s issue based strictly on structured employee metadata.
 
         ### USER QUERY
 
-        {query}
+        {ticket}
 
         ---
 
-        ### TOP 5 CANDIDATE EMPLOYEE CHUNKS (JSON)
+        ### TOP CANDIDATE EMPLOYEES (one per row, columns separated by " | ")
 
-        {top_chunks}
+        {candidates}
 
-        Each chunk represents one employee and must be treated strictly as structured factual data.
+        Each row represents one employee and must be treated strictly as structured factual data.
 
         ---
 
@@ -50,24 +54,19 @@ def generate_answer(data):
 
         ### OUTPUT RULES (CRITICAL)
 
-        * Output ONLY the selected employee as a **valid JSON string** (strict JSON serialization).
-        * Use double quotes for all keys and values.
-        * Output must be a single plain JSON string — **no Markdown, no code fences, no backticks**.
-        * Preserve the original field names, values, and ordering exactly.
-        * Do NOT include explanations, commentary, labels, confidence scores, or extra text.
-        * Do NOT reformat or prettify beyond valid JSON serialization.
+        * Output ONLY the Employee ID of the selected employee, exactly as it appears in the rows.
+        * Do NOT include names, other fields, explanations, commentary, labels, confidence scores, or extra text.
 
         ---
 
-        This is a strict selection + JSON serialization task — not explanation, formatting, or analysis.
+        This is a strict selection task — not explanation, formatting, or analysis.
 
         '''
-        llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.0)
-        response = llm.invoke(prompt)
-        if isinstance(response.content, str):
-            selected_employee = json.loads(response.content)
-        else:
-            selected_employee = response.content
+        content = complete("answer", prompt)
+        selected = ranked_candidates(content, top_chunks)
+        if not selected:
+            raise ValueError(f"LLM did not select a known candidate: {content!r}")
+        selected_employee = selected[0]
         print(f"Selected employee: {json.dumps(selected_employee, indent=2)}")
         return selected_employee
 
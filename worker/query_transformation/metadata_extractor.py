@@ -1,43 +1,25 @@
 from worker.worker import app
 from dotenv import load_dotenv
-import os
-import redis
-import json
+from worker.utils.redis_client import get_redis
+from worker.utils.vocabulary import read_vocabulary
+from worker.utils.local_cache import read_through
 
 load_dotenv()
 
-REDIS_URL = os.getenv("REDIS_VECTOR_URL", "redis://localhost:6379/0")
-INDEX_NAME = "employee_embeddings"
-
 
 @app.task
 def extract_metadata(query, department):
     try:
         print(f"Extracting metadata for '{department}'")
 
-        redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-
-        q = f"@department:{department}"
-        results = redis_client.ft(INDEX_NAME).search(q)
-
-        primary_skills = set()
-        secondary_skills = set()
-        roles = set()
-
-        for doc in results.docs:
-            meta = json.loads(doc.metadata)
-
-            ps = str(meta.get("Primary skills", "")).split(", ")
-            ss = str(meta.get("Secondary skills", "")).split(", ")
-            r = str(meta.get("Role/title", ""))
-
-            primary_skills.update(ps)
-            secondary_skills.update(ss)
-            roles.add(r)
+        vocabulary = read_through(
+            "vocabulary", department,
+            lambda: read_vocabulary(get_redis("vector"), department)
+        )
 
-        primary_skills = ", ".join(s for s in primary_skills if s)
-        secondary_skills = ", ".join(s for s in secondary_skills if s)
-        roles = ", ".join(r for r in roles if r)
+        primary_skills = ", ".join(term for term, _ in vocabulary["primary"])
+        secondary_skills = ", ".join(term for term, _ in vocabulary["secondary"])
+        roles = ", ".join(term for term, _ in vocabulary["role"])
 
         print("Metadata extraction complete")
 
@@ -0,0 +1,54 @@
+from celery import chain, chord, group
+from dotenv import load_dotenv
+import os
+
+from worker.query_transformation.metadata_extractor import extract_metadata
+from worker.query_transformation.query_parser import query_parser
+from worker.query_transformation.retrieve_chunks import retrieve_chunks, speculative_retrieve, merge_retrieve
+from worker.query_transformation.generate_answer import generate_answer
+from worker.query_transformation.assign_ticket import assign_ticket
+from worker.query_transformation.send_notification import send_notification
+from worker.query_transformation.route_ticket import route_ticket
+from worker.utils.ticket_cache import TICKET_CACHE_ENABLED
+
+load_dotenv()
+
+# "chain" runs each stage as its own task, "fused" runs all stages inside
+# one task, "dag" runs metadata extraction and parsing concurrently with a
+# speculative KNN on the raw ticket and merges both candidate sets before
+# reranking. The notification is a separate task in every mode.
+TICKET_PIPELINE_MODE = os.getenv("TICKET_PIPELINE_MODE", "chain")
+
+
+def stage_pipeline(query, department, email, after_answer=()):
+    tail = [*after_answer, send_notification.s(email)]
+    if TICKET_PIPELINE_MODE == "dag":
+        return chain(
+            chord(
+                group(
+                    chain(extract_metadata.s(query, department), query_parser.s()),
+                    speculative_retrieve.s(query, department)
+                ),
+                merge_retrieve.s()
+            ),
+            generate_answer.s(),
+            *tail
+        )
+    if TICKET_PIPELINE_MODE == "fused":
+        return chain(
+            assign_ticket.s(query, department),
+            *tail
+        )
+    return chain(
+        extract_metadata.s(query, department),
+        query_parser.s(),
+        retrieve_chunks.s(),
+        generate_answer.s(),
+        *tail
+    )
+
+
+def ticket_pipeline(query, department, email):
+    if TICKET_CACHE_ENABLED:
+        return route_ticket.s(query, department, email)
+    return stage_pipeline(query, department, email)
@@ -1,13 +1,68 @@
 from worker.worker import app
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-@app.task
-def query_parser(data):
-    try:
-        query,primary_skills,secondary_skills,department, roles = data
-        print(f"Received query for embedding transformation: '{query}'")
-
-        prompt = f'''
+from worker.utils.matcher import PhraseMatcher, variants
+from worker.utils.local_cache import read_through
+from worker.utils.skills import canonicalize
+from worker.utils.llm import complete
+from worker.utils.prompt_budget import fit_ticket
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# "local" matches the ticket against the department vocabulary and only
+# calls the LLM when QUERY_PARSER_LLM_FALLBACK=1 and nothing matched;
+# "llm" always asks the LLM.
+QUERY_PARSER_MODE = os.getenv("QUERY_PARSER_MODE", "local")
+LLM_FALLBACK = os.getenv("QUERY_PARSER_LLM_FALLBACK", "0") == "1"
+
+
+def split_terms(values):
+    return [v.strip() for v in str(values or "").split(",") if v.strip()]
+
+
+def build_matcher(terms):
+    phrases = {}
+    for term in terms:
+        for spelling in variants(term):
+            phrases[spelling] = term
+    return PhraseMatcher(phrases)
+
+
+def _matchers(department, primary_skills, secondary_skills, roles):
+    skills = split_terms(primary_skills) + split_terms(secondary_skills)
+    return build_matcher(skills), build_matcher(split_terms(roles))
+
+
+def local_parse(query, primary_skills, secondary_skills, department, roles):
+    skill_matcher, role_matcher = read_through(
+        "query_matchers", (department, primary_skills, secondary_skills, roles),
+        lambda: _matchers(department, primary_skills, secondary_skills, roles)
+    )
+    primary = set(split_terms(primary_skills))
+    secondary = set(split_terms(secondary_skills))
+
+    # Aliases such as "k8s" or "postgres" are rewritten to the skill names
+    # used in the employee data before matching the department vocabulary.
+    matched = skill_matcher.values(canonicalize(query))
+    primary_hits = [s for s in matched if s in primary]
+    secondary_hits = [s for s in matched if s in secondary and s not in primary]
+    if not primary_hits and not secondary_hits:
+        return "no data"
+
+    fields = [f"Department: {department}"]
+    role_hits = role_matcher.values(query)
+    if role_hits:
+        fields.append(f"Role/title: {role_hits[0]}")
+    if primary_hits:
+        fields.append(f"Primary skills: {', '.join(primary_hits)}")
+    if secondary_hits:
+        fields.append(f"Secondary skills: {', '.join(secondary_hits)}")
+    return ", ".join(fields)
+
+
+def llm_parse(query, primary_skills, secondary_skills, department, roles):
+    query = fit_ticket("query_parser", query)
+    prompt = f'''
         You convert a user issue query into a structured employee-search string optimized for semantic embedding retrieval.
 
          Strict rules:
@@ -129,10 +184,24 @@ def query_parser(data):
 
         '''
      
-        llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.0)
-        response = llm.invoke(prompt)
+    return complete("query_parser", prompt).strip()
+
+
+@app.task
+def query_parser(data):
+    try:
+        query,primary_skills,secondary_skills,department, roles = data
+        print(f"Received query for embedding transformation: '{query}'")
+
+        if QUERY_PARSER_MODE == "llm":
+            parsed = llm_parse(query, primary_skills, secondary_skills, department, roles)
+        else:
+            parsed = local_parse(query, primary_skills, secondary_skills, department, roles)
+            if parsed == "no data" and LLM_FALLBACK:
+                print("Local parser found no skills, falling back to LLM")
+                parsed = llm_parse(query, primary_skills, secondary_skills, department, roles)
 
-        return department,query,response.content
+        return department,query,parsed
     except Exception as e:
         print(f"Error in query to embedding transformation: {e}")
         raise e
@@ -0,0 +1,104 @@
+from worker.utils.matcher import PhraseMatcher, variants
+from worker.utils.skill_aliases import canonical_terms
+from dotenv import load_dotenv
+import numpy as np
+import json
+import os
+import re
+
+load_dotenv()
+
+# "features" scores candidates locally, "cross_encoder" adds a local
+# cross-encoder relevance score on top, "llm" keeps the LLM rerank.
+RERANK_MODE = os.getenv("RERANK_MODE", "features")
+RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", "5"))
+CROSS_ENCODER_MODEL = os.getenv("RERANK_CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+EXPERIENCE_CAP = 20
+
+DEFAULT_WEIGHTS = {
+    "primary": 0.35,
+    "secondary": 0.15,
+    "domain": 0.15,
+    "role": 0.10,
+    "knn": 0.20,
+    "experience": 0.05,
+    "cross": 0.30,
+}
+WEIGHTS = {**DEFAULT_WEIGHTS, **json.loads(os.getenv("RERANK_WEIGHTS", "{}"))}
+FEATURES = ["primary", "secondary", "domain", "role", "knn", "experience"]
+
+_LABELS = re.compile(r"(?:^|,\s*)(Department|Role/title|Primary skills|Secondary skills):\s*")
+
+
+def split_terms(value):
+    return [term.strip() for term in str(value or "").split(",") if term.strip()]
+
+
+def parse_structured_query(parsed_data):
+    """Splits 'Department: .., Role/title: .., Primary skills: a, b, ..' back into fields."""
+    parts = _LABELS.split(parsed_data)
+    fields = {}
+    for label, value in zip(parts[1::2], parts[2::2]):
+        fields[label] = value.strip().rstrip(",").strip()
+    return fields
+
+
+def _membership(candidates, column, terms):
+    # (candidates x query terms) 0/1 matrix
+    index = {term.lower(): i for i, term in enumerate(terms)}
+    matrix = np.zeros((len(candidates), max(len(terms), 1)), dtype=np.float32)
+    for row, meta in enumerate(candidates):
+        for skill in canonical_terms(meta.get(column)):
+            col = index.get(skill.lower())
+            if col is not None:
+                matrix[row, col] = 1.0
+    return matrix
+
+
+def feature_matrix(query, parsed_data, candidates, similarities):
+    fields = parse_structured_query(parsed_data)
+    skills = list(dict.fromkeys(split_terms(fields.get("Primary skills")) + split_terms(fields.get("Secondary skills"))))
+    skill_count = max(len(skills), 1)
+
+    primary = _membership(candidates, "Primary skills", skills).sum(axis=1) / skill_count
+    secondary = _membership(candidates, "Secondary skills", skills).sum(axis=1) / skill_count
+
+    domains = sorted({d for meta in candidates for d in split_terms(meta.get("Problem domains handled"))})
+    domain_hits = set(PhraseMatcher({v: d for d in domains for v in variants(d)}).values(query)) if domains else set()
+    domain = np.array([
+        float(any(d in domain_hits for d in split_terms(meta.get("Problem domains handled"))))
+        for meta in candidates
+    ], dtype=np.float32)
+
+    wanted_role = fields.get("Role/title", "").lower()
+    role = np.array([
+        float(bool(wanted_role) and str(meta.get("Role/title", "")).lower() == wanted_role)
+        for meta in candidates
+    ], dtype=np.float32)
+
+    knn = np.asarray(similarities, dtype=np.float32)
+    experience = np.array([
+        float(meta.get("Experience years") or 0) for meta in candidates
+    ], dtype=np.float32)
+    experience = np.minimum(experience, EXPERIENCE_CAP) / EXPERIENCE_CAP
+
+    return np.stack([primary, secondary, domain, role, knn, experience], axis=1)
+
+
+def cross_encoder_scores(query, candidates):
+    from worker.utils.models import get_cross_encoder
+    pairs = [(query, ", ".join(f"{k}: {v}" for k, v in meta.items())) for meta in candidates]
+    logits = np.asarray(get_cross_encoder(CROSS_ENCODER_MODEL).predict(pairs, show_progress_bar=False), dtype=np.float32)
+    return 1.0 / (1.0 + np.exp(-logits))
+
+
+def rerank(query, parsed_data, candidates, similarities, top_k=RERANK_TOP_K, mode=RERANK_MODE):
+    if not candidates:
+        return []
+    features = feature_matrix(query, parsed_data, candidates, similarities)
+    scores = features @ np.array([WEIGHTS[name] for name in FEATURES], dtype=np.float32)
+    if mode == "cross_encoder":
+        scores = scores + WEIGHTS["cross"] * cross_encoder_scores(query, candidates)
+    # stable sort keeps KNN order between equal scores
+    order = np.argsort(-scores, kind="stable")[:top_k]
+    return [candidates[i] for i in order]
@@ -1,46 +1,100 @@
 from worker.worker import app
-from sentence_transformers import SentenceTransformer
-import redis
+from worker.utils.models import get_model, EMBEDDING_MODEL, EMBEDDING_BACKEND
+from worker.utils.local_cache import TTLCache, LOCAL_CACHE_TTL, register_cache, generation
+from worker.utils.redis_client import get_redis
+from worker.utils.employee_schema import INDEX_NAME, METADATA_FIELDS, from_fields, tag_query
+from worker.utils.employee_index import ensure_index
+from worker.utils.skills import canonicalize
+from worker.utils.llm import complete
+from worker.utils.candidates import ranked_candidates
+from worker.utils.prompt_budget import fit_ticket, fit_candidates
+from worker.query_transformation.reranker import rerank, RERANK_MODE, RERANK_TOP_K
+from redis.commands.search.query import Query
 import os
-import json
-from langchain_google_genai import ChatGoogleGenerativeAI
+import hashlib
 from dotenv import load_dotenv
 import numpy as np
 
 load_dotenv()
 
-REDIS_URL = os.getenv("REDIS_VECTOR_URL", "redis://localhost:6379/0")
-INDEX_NAME = "employee_embeddings"
-
-@app.task
-def retrieve_chunks(data):
-    try:
-        department,query,parsed_data = data
-        if parsed_data == 'no data':
-            raise ValueError("No relevant skills identified. Please choose correct department or try reframing your query.")
-
-        print(f"Received structured query for chunk retrieval: '{data}'")
-
-        model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-        embeddings = model.encode(parsed_data, show_progress_bar=True).tolist()
-
-        redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-
-        query_vec = np.array(embeddings, dtype=np.float32).tobytes()
-        query = f'(@department:"{department}")=>[KNN 10 @embedding $vec AS score]'
-        results = redis_client.ft("employee_embeddings").search(
-            query,
-            query_params={"vec": query_vec}
-        )
-
-        results = [
-            json.dumps(json.loads(doc.metadata), ensure_ascii=False, indent=2)
-            for doc in results.docs
-        ]
-
-        retrieved_chunks = "\n---CHUNK---\n".join(results)
-
-        prompt = f'''
+KNN_K = int(os.getenv("RETRIEVAL_KNN_K", "10"))
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+KNN_CACHE_SIZE = int(os.getenv("KNN_CACHE_SIZE", "1024"))
+
+# Structured queries repeat a lot. Level one keeps the encoded query vector
+# (it only depends on the text and the model, so it survives ingests), level
+# two keeps the KNN result per department and is dropped on every ingest.
+_query_vectors = TTLCache(QUERY_EMBEDDING_CACHE_SIZE, LOCAL_CACHE_TTL)
+_knn_results = register_cache(TTLCache(KNN_CACHE_SIZE, LOCAL_CACHE_TTL))
+
+
+def query_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def query_vector(text, digest):
+    key = (EMBEDDING_MODEL, EMBEDDING_BACKEND, digest)
+    query_vec = _query_vectors.get(key)
+    if query_vec is None:
+        embedding = get_model().encode(text, show_progress_bar=False)
+        query_vec = np.asarray(embedding, dtype=np.float32).tobytes()
+        _query_vectors.set(key, query_vec)
+    return query_vec
+
+
+def search_candidates(department, text):
+    digest = query_hash(text)
+    key = (department, digest, KNN_K, generation())
+    cached = _knn_results.get(key)
+    if cached is not None:
+        return cached
+
+    query_vec = query_vector(text, digest)
+    ensure_index(len(query_vec) // 4)
+    redis_client = get_redis("vector")
+    knn = (
+        Query(f'({tag_query("department", department)})=>[KNN {KNN_K} @embedding $vec AS score]')
+        .return_fields(*METADATA_FIELDS, "score")
+        .sort_by("score")
+        .paging(0, KNN_K)
+        .dialect(2)
+    )
+    results = redis_client.ft(INDEX_NAME).search(
+        knn,
+        query_params={"vec": query_vec}
+    )
+
+    candidates = [from_fields(doc) for doc in results.docs]
+    # score is the cosine distance; 1 - distance is the similarity
+    similarities = [1.0 - float(doc.score) for doc in results.docs]
+    _knn_results.set(key, (candidates, similarities))
+    return candidates, similarities
+
+
+def merge_candidates(*results):
+    """Union of (candidates, similarities) sets keyed by Employee ID, keeping
+    each employee's best similarity, ordered by similarity."""
+    best = {}
+    for candidates, similarities in results:
+        for meta, similarity in zip(candidates, similarities):
+            key = meta.get("Employee ID")
+            if key not in best or similarity > best[key][1]:
+                best[key] = (meta, similarity)
+    merged = sorted(best.values(), key=lambda item: -item[1])
+    return [meta for meta, _ in merged], [similarity for _, similarity in merged]
+
+
+def select_top(query, parsed_data, candidates, similarities):
+    if RERANK_MODE == "llm":
+        return llm_rerank(query, candidates)
+    return rerank(query, parsed_data, candidates, similarities)
+
+
+def llm_rerank(query, candidates):
+    retrieved_chunks = fit_candidates("rerank", candidates)
+    query = fit_ticket("rerank", query)
+
+    prompt = f'''
         You are an expert reranking engine inside a **production RAG ticket-assignment system**. Your job is to identify which employees are most suitable to handle a user’s issue based on structured employee metadata retrieved from a vector database.
 
         ### USER QUERY
@@ -48,11 +102,11 @@ def retrieve_chunks(data):
         {query}
 
 
-        ### RETRIEVED EMPLOYEE CHUNKS (JSON)
+        ### RETRIEVED EMPLOYEES (one per row, columns separated by " | ")
 
         {retrieved_chunks}
 
-        Each chunk represents ONE employee and must be treated strictly as structured factual data (NOT narrative text). Typical fields may include:
+        Each row represents ONE employee and must be treated strictly as structured factual data (NOT narrative text). Typical fields may include:
 
         * Name
         * Employee ID
@@ -108,32 +162,36 @@ def retrieve_chunks(data):
 
         ### OUTPUT RULES (STRICT)
 
-        * Return ONLY the TOP 5 employee JSON chunks.
-        * Reproduce each chunk EXACTLY as received.
-        * Preserve formatting, field order, punctuation, and spacing.
-        * Do NOT summarize, explain, justify, or rank numerically.
-        * Do NOT output reasoning, commentary, labels, or headers.
-        * If fewer than 5 chunks exist, return all unchanged.
+        * Return ONLY the Employee IDs of the TOP {RERANK_TOP_K} employees, best first, as a JSON array, e.g. ["EMP013", "EMP001"].
+        * Use Employee IDs exactly as they appear in the rows.
+        * Do NOT output names, other fields, reasoning, commentary, labels, or headers.
+        * If fewer than {RERANK_TOP_K} rows exist, rank all of them.
 
         ---
 
-        This is a strict reranking and extraction task — NOT generation, summarization, or analysis.
-        '''
+        This is a strict reranking task — NOT generation, summarization, or analysis.
+    '''
+
+    content = complete("rerank", prompt)
+
+    top_chunks = ranked_candidates(content, candidates)[:RERANK_TOP_K]
+    if not top_chunks:
+        print("LLM rerank returned no known Employee IDs, keeping vector search order")
+        top_chunks = candidates[:RERANK_TOP_K]
+    return top_chunks
 
-        llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.0)
-        response = llm.invoke(prompt)
 
-        content = response.content.strip()
-        if content.startswith("```"):
-            content = content.split("\n", 1)[1] if "\n" in content else content[3:]
-            if content.endswith("```"):
-                content = content.rsplit("```", 1)[0]
+@app.task
+def retrieve_chunks(data):
+    try:
+        department,query,parsed_data = data
+        if parsed_data == 'no data':
+            raise ValueError("No relevant skills identified. Please choose correct department or try reframing your query.")
+
+        print(f"Received structured query for chunk retrieval: '{data}'")
 
-        top_chunks = [
-            json.loads(chunk.strip()) 
-            for chunk in content.strip().split("\n---CHUNK---\n") 
-            if chunk.strip()
-        ]
+        candidates, similarities = search_candidates(department, parsed_data)
+        top_chunks = select_top(query, parsed_data, candidates, similarities)
 
         return query,top_chunks
     
@@ -142,6 +200,40 @@ def retrieve_chunks(data):
         raise e
 
 
+# Runs next to metadata extraction and parsing in the DAG pipeline: the raw
+# ticket only needs the department filter, not the parsed query.
+@app.task
+def speculative_retrieve(query, department):
+    try:
+        print(f"Running speculative retrieval for '{department}'")
+        return search_candidates(department, canonicalize(query))
+    except Exception as e:
+        print(f"Error in speculative retrieval: {e}")
+        raise e
+
+
+@app.task
+def merge_retrieve(results):
+    try:
+        (department, query, parsed_data), speculative = results
+        if parsed_data == 'no data':
+            raise ValueError("No relevant skills identified. Please choose correct department or try reframing your query.")
+
+        print(f"Merging speculative candidates for structured query: '{parsed_data}'")
+
+        candidates, similarities = merge_candidates(
+            search_candidates(department, parsed_data),
+            speculative
+        )
+        top_chunks = select_top(query, parsed_data, candidates, similarities)
+
+        return query,top_chunks
+
+    except Exception as e:
+        print(f"Error in merging and reranking chunks: {e}")
+        raise e
+
+
 
 
 # response = "Department: Cloud Ops, Role/title: Data Scientist, Primary skills: R, Python, SQL, Secondary skills: Pandas, ggplot2"
@@ -0,0 +1,37 @@
+from worker.worker import app
+from worker.utils.ticket_cache import entry_key, embed_ticket, lookup, remember
+from worker.query_transformation.send_notification import send_notification
+
+
+# Head of the ticket pipeline when the semantic cache is on: a near-duplicate
+# of a recent ticket in the same department reuses its assignment and goes
+# straight to the notification, anything else runs the configured pipeline.
+@app.task(bind=True)
+def route_ticket(self, query, department, email):
+    from worker.query_transformation.pipelines import stage_pipeline
+
+    try:
+        key = entry_key(department)
+        embedding = embed_ticket(query)
+        cached = lookup(key, embedding)
+    except Exception as e:
+        print(f"Ticket cache lookup failed, running the full pipeline: {e}")
+        key, embedding, cached = None, None, None
+
+    # replace() raises to hand the rest of the work over to the new signature.
+    if cached is not None:
+        assignment, similarity = cached
+        print(f"Reusing cached assignment for '{department}' (similarity {similarity:.3f})")
+        raise self.replace(send_notification.s(assignment, email))
+
+    after_answer = () if key is None else (remember_ticket.s(key, query, embedding),)
+    raise self.replace(stage_pipeline(query, department, email, after_answer))
+
+
+@app.task
+def remember_ticket(assignment, key, query, embedding):
+    try:
+        remember(key, query, embedding, assignment)
+    except Exception as e:
+        print(f"Could not cache ticket assignment: {e}")
+    return assignment
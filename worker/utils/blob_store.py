@@ -0,0 +1,52 @@
+from dotenv import load_dotenv
+import boto3
+import os
+from worker.utils.redis_client import get_redis
+import uuid
+
+load_dotenv()
+
+# Large intermediates between chain stages are parked here and only the
+# returned key travels through the broker and result backend.
+BLOB_BACKEND = os.getenv("BLOB_BACKEND", "redis")
+BLOB_BUCKET = os.getenv("BLOB_BUCKET", os.getenv("AWS_BUCKET", "ticketmaster"))
+BLOB_TTL = int(os.getenv("BLOB_TTL_SECONDS", "3600"))
+
+
+def _s3():
+    return boto3.client(
+        "s3",
+        endpoint_url=os.getenv("AWS_ENDPOINT_URL"),
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        region_name=os.getenv("AWS_REGION_NAME")
+    )
+
+
+def _redis():
+    return get_redis("cache", decode_responses=False)
+
+
+def put_blob(data, kind):
+    key = f"blob:{kind}:{uuid.uuid4()}"
+    if BLOB_BACKEND == "s3":
+        _s3().put_object(Bucket=BLOB_BUCKET, Key=key, Body=data)
+    else:
+        _redis().set(key, data, ex=BLOB_TTL)
+    return key
+
+
+def get_blob(key):
+    if BLOB_BACKEND == "s3":
+        return _s3().get_object(Bucket=BLOB_BUCKET, Key=key)["Body"].read()
+    data = _redis().get(key)
+    if data is None:
+        raise KeyError(f"Blob {key} not found or expired")
+    return data
+
+
+def delete_blob(key):
+    if BLOB_BACKEND == "s3":
+        _s3().delete_object(Bucket=BLOB_BUCKET, Key=key)
+    else:
+        _redis().delete(key)
@@ -0,0 +1,35 @@
+from worker.utils.employee_schema import FIELDS
+import re
+
+# Candidates go to the LLM as one header line plus one " | "-separated row
+# per employee, and the LLM answers with Employee IDs only. The full records
+# are then looked up in the retrieved set instead of being echoed back.
+ID_COLUMN = "Employee ID"
+SEPARATOR = " | "
+
+
+def _cell(value):
+    return " ".join(str("" if value is None else value).replace("|", "/").split())
+
+
+def candidate_table(candidates, columns=tuple(FIELDS)):
+    lines = [SEPARATOR.join(columns)]
+    for meta in candidates:
+        lines.append(SEPARATOR.join(_cell(meta.get(column)) for column in columns))
+    return "\n".join(lines)
+
+
+def ranked_candidates(content, candidates):
+    """Candidates whose Employee ID appears in the LLM answer, in the order
+    the answer mentions them; anything that is not a known ID is ignored."""
+    by_id = {str(meta.get(ID_COLUMN)): meta for meta in candidates if meta.get(ID_COLUMN)}
+    if not by_id or not isinstance(content, str):
+        return []
+    pattern = re.compile(
+        r"(?<![\w-])(" + "|".join(re.escape(i) for i in sorted(by_id, key=len, reverse=True)) + r")(?![\w-])"
+    )
+    ranked = []
+    for employee_id in pattern.findall(content):
+        if by_id[employee_id] not in ranked:
+            ranked.append(by_id[employee_id])
+    return ranked
@@ -0,0 +1,137 @@
+from redis.commands.search.index_definition import IndexDefinition, IndexType
+from redis.exceptions import ResponseError
+from worker.utils.redis_client import get_redis, run_once
+from worker.utils.employee_schema import INDEX_NAME, LEGACY_INDEXES, KEY_PREFIX, schema, to_hash, employee_key, content_hash
+import json
+
+# Set once the hashes written before the typed schema (random emp:{uuid} keys
+# with a JSON metadata blob) have been rewritten as emp:{Employee ID}.
+LEGACY_MIGRATION_MARKER = f"{INDEX_NAME}:legacy_migrated"
+MIGRATION_BATCH = 1000
+
+# Both the ingest path and the query path call ensure_index; after the first
+# successful call a process skips the round trips.
+_ready = False
+
+
+def _text(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _legacy_rows(redis_client, keys):
+    pipe = redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.hgetall(key)
+    for key, row in zip(keys, pipe.execute()):
+        if row and b"employee_id" not in row:
+            try:
+                meta = json.loads(_text(row.get(b"metadata") or b"{}"))
+            except ValueError:
+                meta = {}
+            yield key, row, meta
+
+
+def _migrate_batch(redis_client, keys):
+    legacy = list(_legacy_rows(redis_client, keys))
+    if not legacy:
+        return 0
+    # Rows without an Employee ID or an embedding cannot be rewritten and
+    # are only deleted.
+    movable = [(row, meta) for _, row, meta in legacy if meta.get("Employee ID") and row.get(b"embedding")]
+
+    # A typed hash written by a newer ingest wins over the legacy copy.
+    pipe = redis_client.pipeline(transaction=False)
+    for _, meta in movable:
+        pipe.exists(employee_key(meta))
+    typed = pipe.execute()
+
+    migrated = 0
+    pipe = redis_client.pipeline()
+    for (row, meta), exists in zip(movable, typed):
+        if exists:
+            continue
+        text = _text(row.get(b"text") or b"")
+        pipe.hset(
+            employee_key(meta),
+            mapping={
+                "embedding": row[b"embedding"],
+                "text": text,
+                "content_hash": content_hash(text),
+                **to_hash(meta),
+            },
+        )
+        migrated += 1
+    pipe.delete(*[key for key, _, _ in legacy])
+    pipe.execute()
+    return migrated
+
+
+def migrate_legacy_documents(redis_client):
+    """Rewrites every legacy emp:{uuid} hash as a typed emp:{Employee ID} hash
+    and deletes the legacy key. Returns the number of hashes rewritten."""
+    migrated = 0
+    batch = []
+    for key in redis_client.scan_iter(match=f"{KEY_PREFIX}*", count=MIGRATION_BATCH):
+        batch.append(key)
+        if len(batch) >= MIGRATION_BATCH:
+            migrated += _migrate_batch(redis_client, batch)
+            batch = []
+    if batch:
+        migrated += _migrate_batch(redis_client, batch)
+    if migrated:
+        print(f"Migrated {migrated} legacy employee hashes to {INDEX_NAME}")
+    return migrated
+
+
+def stored_dim(redis_client):
+    """Embedding dimension of any stored employee, or None when there are none."""
+    for key in redis_client.scan_iter(match=f"{KEY_PREFIX}*", count=MIGRATION_BATCH):
+        embedding = redis_client.hget(key, "embedding")
+        if embedding:
+            return len(embedding) // 4
+    return None
+
+
+def create_index(redis_client, dim):
+    print(f"Creating index {INDEX_NAME}")
+    try:
+        redis_client.ft(INDEX_NAME).create_index(
+            schema(dim),
+            # Legacy hashes have no employee_id and stay out of the index
+            # until they are migrated.
+            definition=IndexDefinition(
+                prefix=[KEY_PREFIX],
+                index_type=IndexType.HASH,
+                filter="exists(@employee_id)",
+            ),
+        )
+    except ResponseError as e:
+        # Another process created it between our check and create.
+        if "already exists" not in str(e).lower():
+            raise
+        return
+    for legacy in LEGACY_INDEXES:
+        try:
+            redis_client.ft(legacy).dropindex(delete_documents=False)
+            print(f"Dropped legacy index {legacy}")
+        except:
+            pass
+
+
+def ensure_index(dim=None):
+    """Migrates the legacy hashes (once per deployment) and creates the typed
+    index. Without `dim` the dimension is taken from the stored embeddings;
+    with no embeddings stored yet the index is left for the first ingest."""
+    global _ready
+    if _ready:
+        return
+    redis_client = get_redis("vector", decode_responses=False)
+    run_once(redis_client, LEGACY_MIGRATION_MARKER, lambda: migrate_legacy_documents(redis_client))
+    try:
+        redis_client.ft(INDEX_NAME).info()
+    except ResponseError:
+        dim = dim or stored_dim(redis_client)
+        if dim is None:
+            return
+        create_index(redis_client, dim)
+    _ready = True
@@ -0,0 +1,83 @@
+from redis.commands.search.field import VectorField, TextField, TagField, NumericField
+import hashlib
+import re
+
+# Bump SCHEMA_VERSION whenever the field layout changes; ensure_index in
+# employee_index builds the new index next to the old ones and drops them.
+SCHEMA_VERSION = 2
+INDEX_BASE = "employee_embeddings"
+INDEX_NAME = f"{INDEX_BASE}:v{SCHEMA_VERSION}"
+LEGACY_INDEXES = [INDEX_BASE] + [f"{INDEX_BASE}:v{v}" for v in range(2, SCHEMA_VERSION)]
+KEY_PREFIX = "emp:"
+
+# CSV column -> hash field
+FIELDS = {
+    "Employee ID": "employee_id",
+    "Email": "email",
+    "Name": "name",
+    "Department": "department",
+    "Role/title": "role",
+    "Primary skills": "primary_skills",
+    "Secondary skills": "secondary_skills",
+    "Experience years": "experience_years",
+    "Problem domains handled": "problem_domains",
+}
+COLUMNS = {field: col for col, field in FIELDS.items()}
+METADATA_FIELDS = list(FIELDS.values())
+
+_TAG_SPECIAL = re.compile(r"([,.<>{}\[\]\"':;!@#$%^&*()\-+=~|/\\ ])")
+
+
+def schema(dim):
+    return (
+        TextField("text"),
+        TagField("employee_id"),
+        TagField("department"),
+        TagField("role"),
+        TagField("primary_skills", separator=","),
+        TagField("secondary_skills", separator=","),
+        TagField("problem_domains", separator=","),
+        NumericField("experience_years", sortable=True),
+        VectorField(
+            "embedding",
+            "HNSW",
+            {
+                "TYPE": "FLOAT32",
+                "DIM": dim,
+                "DISTANCE_METRIC": "COSINE"
+            },
+        ),
+    )
+
+
+def employee_key(meta):
+    return f"{KEY_PREFIX}{meta['Employee ID']}"
+
+
+# The schema version is part of the hash so a layout change rewrites every row once.
+def content_hash(text):
+    return hashlib.sha256(f"v{SCHEMA_VERSION}:{text}".encode("utf-8")).hexdigest()
+
+
+def to_hash(meta):
+    return {FIELDS[col]: str(meta.get(col, "")) for col in FIELDS}
+
+
+def from_fields(doc):
+    meta = {}
+    for field in METADATA_FIELDS:
+        value = getattr(doc, field, None) if not isinstance(doc, dict) else doc.get(field)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        if field == "experience_years" and value not in (None, ""):
+            value = int(float(value))
+        meta[COLUMNS[field]] = value if value is not None else ""
+    return meta
+
+
+def tag_escape(value):
+    return _TAG_SPECIAL.sub(r"\\\1", str(value))
+
+
+def tag_query(field, value):
+    return f"@{field}:{{{tag_escape(value)}}}"
@@ -0,0 +1,104 @@
+from worker.utils.llm_cache import cached_invoke
+from langchain_google_genai import ChatGoogleGenerativeAI
+from dotenv import load_dotenv
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+load_dotenv()
+
+# Each stage picks its provider with LLM_PROVIDER_<STAGE> (falling back to
+# LLM_PROVIDER) and its model with LLM_MODEL_<STAGE> (falling back to the
+# provider default), e.g. LLM_PROVIDER_QUERY_PARSER=ollama with
+# LLM_PROVIDER_ANSWER=gemini. "fake" answers in-process without a network
+# call and is meant for benchmarks.
+STAGES = ("query_parser", "rerank", "answer", "error_summary")
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+DEFAULT_MODELS = {
+    "gemini": os.getenv("GEMINI_MODEL", "gemini-2.5-flash"),
+    "ollama": os.getenv("OLLAMA_MODEL", "llama3.1:8b"),
+    "fake": "fake",
+}
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+FAKE_LATENCY = float(os.getenv("LLM_FAKE_LATENCY_MS", "0")) / 1000
+# Upper bound on concurrent LLM requests per process. Under the gevent pool
+# the semaphore is cooperative, so waiting tickets just yield.
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "32"))
+
+_clients = {}
+_lock = threading.Lock()
+_in_flight = threading.BoundedSemaphore(LLM_MAX_IN_FLIGHT)
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+        self.text = content
+
+
+class FakeChatModel:
+    """Deterministic stand-in: candidate prompts get the Employee IDs of the
+    table rows in the order given, anything else a fixed reply derived from
+    the prompt hash."""
+
+    _ROW = re.compile(r"^\s*([^|\n]+?)\s*\|", re.MULTILINE)
+
+    def invoke(self, prompt):
+        if FAKE_LATENCY:
+            time.sleep(FAKE_LATENCY)
+        ids = [i for i in self._ROW.findall(prompt) if i != "Employee ID"]
+        if ids:
+            return FakeResponse(json.dumps(ids))
+        return FakeResponse(f"fake response {hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]}")
+
+
+def stage_config(stage):
+    key = stage.upper()
+    provider = os.getenv(f"LLM_PROVIDER_{key}", LLM_PROVIDER)
+    if provider not in DEFAULT_MODELS:
+        raise ValueError(f"Unknown LLM provider: {provider}")
+    return provider, os.getenv(f"LLM_MODEL_{key}", DEFAULT_MODELS[provider])
+
+
+def _create(provider, model):
+    if provider == "gemini":
+        return ChatGoogleGenerativeAI(model=model, temperature=0.0)
+    if provider == "ollama":
+        from langchain_ollama import ChatOllama
+        return ChatOllama(model=model, temperature=0.0, base_url=OLLAMA_BASE_URL)
+    if provider == "fake":
+        return FakeChatModel()
+    raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def get_llm(provider, model):
+    # One client per process and (provider, model), so its HTTP connections
+    # are kept alive across calls.
+    llm = _clients.get((provider, model))
+    if llm is None:
+        with _lock:
+            llm = _clients.get((provider, model))
+            if llm is None:
+                print(f"Creating LLM client: {provider}/{model} (pid {os.getpid()})")
+                llm = _create(provider, model)
+                _clients[(provider, model)] = llm
+    return llm
+
+
+def complete(stage, prompt, cache=True):
+    """Response text for `prompt` from the stage's provider and model."""
+    provider, model = stage_config(stage)
+    llm = get_llm(provider, model)
+
+    def invoke(p):
+        with _in_flight:
+            # .content may be a list of content blocks (Gemini); .text is
+            # always the joined string.
+            return llm.invoke(p).text
+
+    if not cache:
+        return invoke(prompt)
+    return cached_invoke(f"{provider}:{model}", prompt, invoke)
@@ -0,0 +1,99 @@
+from worker.utils.redis_client import get_redis
+from worker.utils.local_cache import TTLCache, register_cache, generation
+from dotenv import load_dotenv
+import hashlib
+import os
+import time
+
+load_dotenv()
+
+# Responses are cached under (model, normalized prompt, dataset generation):
+# every LLM call runs at temperature 0, so an identical prompt against the
+# same employee data gets the same answer. A new ingest changes the
+# generation and therefore every key. Entries live in the shared cache store
+# (bounded by TTL and LLM_CACHE_MAX_ENTRIES) with a small per-process LRU
+# in front of it.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", "65536"))
+LLM_CACHE_LOCAL_SIZE = int(os.getenv("LLM_CACHE_LOCAL_SIZE", "256"))
+
+KEY_PREFIX = "llm_cache:"
+INDEX_KEY = "llm_cache:index"
+STATS_KEY = "llm_cache:stats"
+
+_local = register_cache(TTLCache(LLM_CACHE_LOCAL_SIZE, LLM_CACHE_TTL))
+
+
+def normalize_prompt(prompt):
+    return " ".join(prompt.split())
+
+
+def cache_key(model, prompt):
+    digest = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+    return f"{KEY_PREFIX}{model}:{generation()}:{digest}"
+
+
+def _count(field):
+    try:
+        get_redis("cache").hincrby(STATS_KEY, field, 1)
+    except Exception as e:
+        print(f"Could not update LLM cache stats: {e}")
+
+
+def _lookup(key):
+    value = _local.get(key)
+    if value is not None:
+        return value
+    try:
+        value = get_redis("cache").get(key)
+    except Exception as e:
+        print(f"LLM cache read failed: {e}")
+        return None
+    if value is not None:
+        _local.set(key, value)
+    return value
+
+
+def _store(key, value):
+    _local.set(key, value)
+    try:
+        redis_client = get_redis("cache")
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.setex(key, LLM_CACHE_TTL, value)
+        pipe.zadd(INDEX_KEY, {key: time.time()})
+        pipe.zcard(INDEX_KEY)
+        size = pipe.execute()[-1]
+        # Oldest entries go first once the store is over its entry budget.
+        if size > LLM_CACHE_MAX_ENTRIES:
+            evicted = [k for k, _ in redis_client.zpopmin(INDEX_KEY, size - LLM_CACHE_MAX_ENTRIES)]
+            if evicted:
+                redis_client.delete(*evicted)
+    except Exception as e:
+        print(f"LLM cache write failed: {e}")
+
+
+def cached_invoke(model, prompt, invoke):
+    """Returns invoke(prompt) for this model, served from the cache when the
+    same prompt was answered before against the current dataset."""
+    if not LLM_CACHE_ENABLED:
+        return invoke(prompt)
+
+    key = cache_key(model, prompt)
+    value = _lookup(key)
+    if value is not None:
+        _count("hits")
+        return value
+
+    _count("misses")
+    value = invoke(prompt)
+    # Only plain text answers within the size limit are worth keeping.
+    if isinstance(value, str) and len(value.encode("utf-8")) <= LLM_CACHE_MAX_BYTES:
+        _store(key, value)
+    return value
+
+
+def stats():
+    counts = get_redis("cache").hgetall(STATS_KEY)
+    return {field: int(count) for field, count in counts.items()}
@@ -0,0 +1,132 @@
+from worker.utils.redis_client import get_redis
+from collections import OrderedDict
+from dotenv import load_dotenv
+import os
+import threading
+import time
+
+load_dotenv()
+
+# Every ingest bumps the dataset generation and publishes it; each process
+# keeps its own copy of the counter (updated from pub/sub) and keys cached
+# entries by it, so an ingest invalidates every process at once. The TTL
+# only bounds staleness if an invalidation message is missed.
+GENERATION_KEY = "dataset:generation"
+INVALIDATION_CHANNEL = "dataset:invalidate"
+LOCAL_CACHE_SIZE = int(os.getenv("LOCAL_CACHE_SIZE", "1024"))
+LOCAL_CACHE_TTL = float(os.getenv("LOCAL_CACHE_TTL_SECONDS", "300"))
+LISTENER_RETRY_SECONDS = 5
+
+
+class TTLCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_cache = TTLCache(LOCAL_CACHE_SIZE, LOCAL_CACHE_TTL)
+_state = {"generation": None, "pid": None}
+_start_lock = threading.Lock()
+_caches = [_cache]
+
+
+def register_cache(cache):
+    """Caches registered here are cleared together with the shared one."""
+    _caches.append(cache)
+    return cache
+
+
+def _refresh(generation):
+    if generation != _state["generation"]:
+        _state["generation"] = generation
+        for cache in _caches:
+            cache.clear()
+
+
+def _fetch_generation(redis_client):
+    return int(redis_client.get(GENERATION_KEY) or 0)
+
+
+def _listen():
+    while True:
+        try:
+            redis_client = get_redis("metadata")
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            _refresh(_fetch_generation(redis_client))
+            for message in pubsub.listen():
+                _refresh(int(message["data"]))
+        except Exception as e:
+            print(f"Cache invalidation listener error: {e}")
+            time.sleep(LISTENER_RETRY_SECONDS)
+
+
+def start_listener():
+    # Threads do not survive fork, so every worker child starts its own.
+    if _state["pid"] == os.getpid():
+        return
+    with _start_lock:
+        if _state["pid"] == os.getpid():
+            return
+        _state["pid"] = os.getpid()
+        try:
+            _refresh(_fetch_generation(get_redis("metadata")))
+        except Exception as e:
+            print(f"Could not read dataset generation: {e}")
+        threading.Thread(target=_listen, name="cache-invalidation", daemon=True).start()
+
+
+def generation():
+    start_listener()
+    return _state["generation"]
+
+
+def cache_get(namespace, key, default=None):
+    return _cache.get((namespace, generation(), key), default)
+
+
+def cache_set(namespace, key, value):
+    _cache.set((namespace, generation(), key), value)
+
+
+def read_through(namespace, key, loader):
+    value = cache_get(namespace, key)
+    if value is None:
+        value = loader()
+        cache_set(namespace, key, value)
+    return value
+
+
+def bump_generation():
+    redis_client = get_redis("metadata")
+    new_generation = redis_client.incr(GENERATION_KEY)
+    redis_client.publish(INVALIDATION_CHANNEL, new_generation)
+    return new_generation
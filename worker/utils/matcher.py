@@ -0,0 +1,105 @@
+from collections import deque
+import re
+
+_SEPARATORS = re.compile(r"[\s\-_/.]+")
+
+
+def _is_word_char(ch):
+    return ch.isalnum()
+
+
+def variants(phrase):
+    """Case-folded spellings of a phrase: as written, and with separators
+    spaced or dropped ("Spring Boot" -> "spring boot", "springboot", "spring-boot")."""
+    phrase = phrase.strip()
+    if len(phrase) <= 2:
+        return {phrase}
+    lowered = phrase.lower()
+    spaced = _SEPARATORS.sub(" ", lowered).strip()
+    return {lowered, spaced, spaced.replace(" ", ""), spaced.replace(" ", "-")} - {""}
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over many phrases at once.
+
+    Matching is case-insensitive and only accepts whole words, so "java" does not
+    fire inside "javascript". Phrases of one or two characters ("R", "Go", "C")
+    are too ambiguous in prose and must match with their original casing.
+    """
+
+    def __init__(self, phrases):
+        # phrases: {spelling: value}
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for spelling, value in phrases.items():
+            if spelling:
+                self._add(spelling, value)
+        self._build()
+
+    def __bool__(self):
+        return len(self._goto) > 1
+
+    def _add(self, spelling, value):
+        node = 0
+        for ch in spelling.lower():
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(spelling), spelling, value))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                candidate = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = candidate if candidate != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _scan(self, text):
+        lowered = text.lower()
+        node = 0
+        for end, ch in enumerate(lowered, start=1):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, spelling, value in self._out[node]:
+                start = end - length
+                if start > 0 and _is_word_char(lowered[start - 1]) and _is_word_char(spelling[0]):
+                    continue
+                if end < len(lowered) and _is_word_char(lowered[end]) and _is_word_char(spelling[-1]):
+                    continue
+                if length <= 2 and text[start:end] != spelling:
+                    continue
+                yield start, end, value
+
+    def find(self, text):
+        """Leftmost-longest, non-overlapping matches as (start, end, value),
+        with offsets into the whitespace-collapsed text."""
+        text = " ".join(text.split())
+        matches = sorted(self._scan(text), key=lambda m: (m[0], -(m[1] - m[0])))
+        selected = []
+        last_end = 0
+        for start, end, value in matches:
+            if start >= last_end:
+                selected.append((start, end, value))
+                last_end = end
+        return selected
+
+    def values(self, text):
+        """Distinct matched values in order of first appearance."""
+        seen = []
+        for _, _, value in self.find(text):
+            if value not in seen:
+                seen.append(value)
+        return seen
@@ -0,0 +1,108 @@
+from dotenv import load_dotenv
+import numpy as np
+import os
+import threading
+
+load_dotenv()
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# "torch" runs the PyTorch weights, "onnx" runs an exported int8-quantized
+# graph through onnxruntime on CPU.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_FILE = os.getenv("ONNX_MODEL_FILE", "onnx/model_quint8_avx2.onnx")
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "1") == "1"
+PARITY_CHECK = os.getenv("EMBEDDING_PARITY_CHECK", "1") == "1"
+PARITY_TOLERANCE = float(os.getenv("EMBEDDING_PARITY_TOLERANCE", "0.98"))
+
+PARITY_TEXTS = [
+    "Employee ID: EMP002, Department: Cloud Ops, Role/title: DevOps Engineer, Primary skills: AWS, Kubernetes, Terraform, Secondary skills: Prometheus, CI/CD, Linux, Experience years: 7, Problem domains handled: E-commerce",
+    "Employee ID: EMP001, Department: Engineering, Role/title: Backend Developer, Primary skills: Java, Spring Boot, SQL, Secondary skills: Kafka, Redis, Docker, Experience years: 5, Problem domains handled: FinTech",
+    "Department: Cloud Ops, Role/title: DevOps Engineer, Primary skills: Kubernetes, AWS, Terraform, Secondary skills: Prometheus",
+    "Kubernetes cluster experiencing OOMKilled errors, need to analyze memory usage with Prometheus and adjust resource limits.",
+    "Need to build a credit risk scoring model using historical loan data, experience with financial datasets required.",
+]
+
+_models = {}
+_lock = threading.Lock()
+
+
+# sentence_transformers (and torch with it) is imported on first load, so
+# processes that never embed, such as the gevent io worker, do not pay for it.
+def _load(name, backend):
+    from sentence_transformers import SentenceTransformer
+    if backend == "onnx":
+        return SentenceTransformer(name, backend="onnx", model_kwargs={"file_name": ONNX_MODEL_FILE})
+    if backend == "torch":
+        return SentenceTransformer(name)
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+def get_model(name=EMBEDDING_MODEL, backend=EMBEDDING_BACKEND):
+    model = _models.get((name, backend))
+    if model is None:
+        with _lock:
+            model = _models.get((name, backend))
+            if model is None:
+                print(f"Loading model: {name} [{backend}] (pid {os.getpid()})")
+                model = _load(name, backend)
+                _models[(name, backend)] = model
+    return model
+
+
+def get_cross_encoder(name):
+    model = _models.get((name, "cross_encoder"))
+    if model is None:
+        with _lock:
+            model = _models.get((name, "cross_encoder"))
+            if model is None:
+                print(f"Loading cross-encoder: {name} (pid {os.getpid()})")
+                from sentence_transformers import CrossEncoder
+                model = CrossEncoder(name)
+                _models[(name, "cross_encoder")] = model
+    return model
+
+
+def check_parity(name=EMBEDDING_MODEL, backend=EMBEDDING_BACKEND, texts=PARITY_TEXTS, tolerance=PARITY_TOLERANCE):
+    # Both models are loaded outside the registry so they are freed afterwards
+    # and a parent process that forks later holds no onnxruntime session.
+    baseline = _load(name, "torch").encode(texts, show_progress_bar=False, normalize_embeddings=True)
+    candidate = _load(name, backend).encode(texts, show_progress_bar=False, normalize_embeddings=True)
+    similarity = float(np.min(np.sum(baseline * candidate, axis=1)))
+    print(f"Embedding parity {backend} vs torch: min cosine {similarity:.4f} (tolerance {tolerance})")
+    if similarity < tolerance:
+        raise ValueError(f"{backend} embeddings drift from torch baseline: min cosine {similarity:.4f} < {tolerance}")
+    return similarity
+
+
+def preload_models(names=(EMBEDDING_MODEL,)):
+    # Only torch weights are safe to share across fork; onnxruntime sessions
+    # are not, so the onnx backend is loaded in each child by warm_up.
+    if EMBEDDING_BACKEND != "torch":
+        return
+    for name in names:
+        get_model(name)
+
+
+def parity_marker(name, backend=EMBEDDING_BACKEND):
+    return f"embedding_parity:{name}:{backend}:{ONNX_MODEL_FILE}"
+
+
+def verify_parity(names=(EMBEDDING_MODEL,)):
+    """Runs check_parity once per model, backend and ONNX file across all
+    workers; the first worker to start records the pass in Redis and the
+    others skip it."""
+    if EMBEDDING_BACKEND == "torch" or not PARITY_CHECK:
+        return
+    from worker.utils.redis_client import get_redis, run_once
+    redis_client = get_redis("cache")
+    for name in names:
+        run_once(redis_client, parity_marker(name), lambda: check_parity(name))
+
+
+def warm_up(names=(EMBEDDING_MODEL,)):
+    for name in names:
+        get_model(name).encode(["warm up"], show_progress_bar=False)
+
+
+if __name__ == "__main__":
+    check_parity()
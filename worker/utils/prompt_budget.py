@@ -0,0 +1,151 @@
+from worker.utils.redis_client import get_redis
+from worker.utils.candidates import candidate_table
+from dotenv import load_dotenv
+import math
+import os
+import re
+
+load_dotenv()
+
+# Tickets often carry pasted logs and stack traces. When a ticket is over its
+# stage's ceiling, runs of repeated log lines and long runs of stack frames
+# are collapsed and what is left is cut to the ceiling, keeping the head and
+# the tail where the actual error usually is. Candidates keep only the
+# columns the ranking looks at, and rows are dropped from the bottom if the
+# table is still over its ceiling.
+PROMPT_BUDGET_ENABLED = os.getenv("PROMPT_BUDGET_ENABLED", "1") == "1"
+DEFAULT_TICKET_TOKENS = {"query_parser": 400, "rerank": 400, "answer": 400}
+TICKET_TOKENS = {
+    stage: int(os.getenv(f"PROMPT_BUDGET_{stage.upper()}", str(tokens)))
+    for stage, tokens in DEFAULT_TICKET_TOKENS.items()
+}
+CANDIDATE_TOKENS = int(os.getenv("PROMPT_BUDGET_CANDIDATES", "1500"))
+STATS_KEY = "prompt_budget:saved"
+
+RANKING_COLUMNS = (
+    "Employee ID",
+    "Department",
+    "Role/title",
+    "Primary skills",
+    "Secondary skills",
+    "Experience years",
+    "Problem domains handled",
+)
+CHARS_PER_TOKEN = 4
+FRAMES_HEAD = 3
+FRAMES_TAIL = 2
+
+_VOLATILE = re.compile(r"0x[0-9a-fA-F]+|[0-9a-fA-F]{8,}|\d+")
+_FRAME = re.compile(r'^\s*(at\s+\S|File\s+"|\.\.\.\s*\d+\s+more)')
+_LOG_LINE = re.compile(r"^\s*\[?(\d{4}-\d{2}-\d{2}|\d{2}:\d{2}:\d{2})|\b(TRACE|DEBUG|INFO|WARN|WARNING|ERROR|FATAL|CRITICAL)\b")
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _shape(line):
+    # Only log lines and stack frames are candidates for deduplication; log
+    # lines that differ only in timestamps, ids or counters share a shape.
+    if _FRAME.match(line):
+        return line.strip()
+    if _LOG_LINE.search(line):
+        return _VOLATILE.sub("#", line.strip())
+    return None
+
+
+def _dedupe_lines(lines):
+    result, run_shape, count = [], None, 0
+
+    def flush():
+        if count > 1:
+            result[-1] = f"{result[-1]} (repeated {count}x)"
+
+    for line in lines:
+        shape = _shape(line)
+        if shape is not None and shape == run_shape:
+            count += 1
+            continue
+        flush()
+        result.append(line)
+        run_shape, count = shape, 1
+    flush()
+    return result
+
+
+def _collapse_frames(lines):
+    result, run = [], []
+
+    def flush():
+        if len(run) > FRAMES_HEAD + FRAMES_TAIL:
+            skipped = len(run) - FRAMES_HEAD - FRAMES_TAIL
+            result.extend(run[:FRAMES_HEAD] + [f"    ... {skipped} frames omitted ..."] + run[-FRAMES_TAIL:])
+        else:
+            result.extend(run)
+        run.clear()
+
+    for line in lines:
+        if _FRAME.match(line):
+            run.append(line)
+        else:
+            flush()
+            result.append(line)
+    flush()
+    return result
+
+
+def _truncate(text, max_tokens):
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    keep = max_tokens * CHARS_PER_TOKEN
+    head, tail = text[:keep * 2 // 3], text[-(keep // 3):]
+    omitted = estimate_tokens(text) - estimate_tokens(head) - estimate_tokens(tail)
+    return f"{head}\n[... {omitted} tokens omitted ...]\n{tail}"
+
+
+def compact_ticket(text, max_tokens):
+    # Tickets within budget go through untouched.
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    lines = text.splitlines()
+    if len(lines) > 1:
+        text = "\n".join(_collapse_frames(_dedupe_lines(lines)))
+    return _truncate(text, max_tokens)
+
+
+def _report(stage, part, before, after):
+    saved = before - after
+    if saved <= 0:
+        return
+    print(f"Prompt budget [{stage}] {part}: {before} -> {after} tokens (saved {saved})")
+    try:
+        get_redis("cache").hincrby(STATS_KEY, stage, saved)
+    except Exception as e:
+        print(f"Could not update prompt budget stats: {e}")
+
+
+def fit_ticket(stage, text):
+    if not PROMPT_BUDGET_ENABLED:
+        return text
+    fitted = compact_ticket(text, TICKET_TOKENS[stage])
+    _report(stage, "ticket", estimate_tokens(text), estimate_tokens(fitted))
+    return fitted
+
+
+def fit_candidates(stage, candidates):
+    """Candidate table for a prompt, trimmed to the ranking columns and the
+    candidate token ceiling."""
+    if not PROMPT_BUDGET_ENABLED:
+        return candidate_table(candidates)
+    table = candidate_table(candidates, RANKING_COLUMNS)
+    rows = len(candidates)
+    while rows > 1 and estimate_tokens(table) > CANDIDATE_TOKENS:
+        rows -= 1
+        table = candidate_table(candidates[:rows], RANKING_COLUMNS)
+    _report(stage, "candidates", estimate_tokens(candidate_table(candidates)), estimate_tokens(table))
+    return table
+
+
+def stats():
+    counts = get_redis("cache").hgetall(STATS_KEY)
+    return {stage: int(saved) for stage, saved in counts.items()}
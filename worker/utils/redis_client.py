@@ -0,0 +1,109 @@
+from dotenv import load_dotenv
+import os
+import threading
+import time
+import redis
+import redis.asyncio as aioredis
+
+load_dotenv()
+
+# One URL per logical store. Every task and route goes through the pools
+# below so a process reuses its TCP connections instead of reconnecting
+# on each call. docker-compose passes unset variables through as empty
+# strings, so those fall back to the defaults as well.
+REDIS_URLS = {
+    "metadata": os.getenv("REDIS_HOST") or "redis://localhost:6379/1",
+    "vector": os.getenv("REDIS_VECTOR_URL") or "redis://localhost:6379/2",
+    "cache": os.getenv("REDIS_CACHE_URL") or "redis://localhost:6379/3",
+}
+MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "20"))
+POOL_TIMEOUT = int(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+
+_pools = {}
+_async_pools = {}
+_lock = threading.Lock()
+
+
+def size_pools(concurrency):
+    """Makes pools created from now on big enough for `concurrency` callers,
+    plus one connection for the cache invalidation listener."""
+    global MAX_CONNECTIONS
+    MAX_CONNECTIONS = max(MAX_CONNECTIONS, concurrency + 1)
+
+
+def _pool_kwargs(decode_responses):
+    return {
+        "max_connections": MAX_CONNECTIONS,
+        "timeout": POOL_TIMEOUT,
+        "health_check_interval": HEALTH_CHECK_INTERVAL,
+        "decode_responses": decode_responses,
+    }
+
+
+def get_redis(store, decode_responses=True):
+    key = (store, decode_responses)
+    pool = _pools.get(key)
+    if pool is None:
+        with _lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = redis.BlockingConnectionPool.from_url(REDIS_URLS[store], **_pool_kwargs(decode_responses))
+                _pools[key] = pool
+    return redis.Redis(connection_pool=pool)
+
+
+def get_async_redis(store, decode_responses=True):
+    key = (store, decode_responses)
+    pool = _async_pools.get(key)
+    if pool is None:
+        pool = aioredis.BlockingConnectionPool.from_url(REDIS_URLS[store], **_pool_kwargs(decode_responses))
+        _async_pools[key] = pool
+    return aioredis.Redis(connection_pool=pool)
+
+
+def run_once(redis_client, marker, task, lock_timeout=600, poll=0.2):
+    """Runs `task` in exactly one process for the lifetime of `marker`; other
+    callers block until that process has set the marker. Returns the task's
+    result in the process that ran it, None everywhere else."""
+    lock = f"{marker}:lock"
+    while not redis_client.exists(marker):
+        if redis_client.set(lock, 1, nx=True, ex=lock_timeout):
+            try:
+                if redis_client.exists(marker):
+                    return None
+                result = task()
+                redis_client.set(marker, 1)
+                return result
+            finally:
+                redis_client.delete(lock)
+        time.sleep(poll)
+    return None
+
+
+def check_health():
+    status = {}
+    for store in REDIS_URLS:
+        try:
+            status[store] = get_redis(store).ping()
+        except redis.RedisError as e:
+            print(f"Redis store '{store}' unreachable: {e}")
+            status[store] = False
+    return status
+
+
+async def check_health_async():
+    status = {}
+    for store in REDIS_URLS:
+        try:
+            status[store] = await get_async_redis(store).ping()
+        except redis.RedisError as e:
+            print(f"Redis store '{store}' unreachable: {e}")
+            status[store] = False
+    return status
+
+
+async def close_async_pools():
+    for pool in _async_pools.values():
+        await pool.disconnect()
+    _async_pools.clear()
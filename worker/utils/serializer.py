@@ -0,0 +1,92 @@
+from kombu.serialization import register
+from dotenv import load_dotenv
+import datetime
+import msgpack
+import numpy as np
+import os
+import struct
+import uuid
+import zstandard
+
+load_dotenv()
+
+SERIALIZER_NAME = "tmpack"
+CONTENT_TYPE = "application/x-ticketmaster-msgpack"
+COMPRESS_THRESHOLD = int(os.getenv("SERIALIZER_COMPRESS_THRESHOLD", "65536"))
+COMPRESS_LEVEL = int(os.getenv("SERIALIZER_COMPRESS_LEVEL", "3"))
+
+_NDARRAY = 1
+_RAW = b"\x00"
+_ZSTD = b"\x01"
+
+_compressor = zstandard.ZstdCompressor(level=COMPRESS_LEVEL)
+_decompressor = zstandard.ZstdDecompressor()
+
+
+# ndarray extension layout: u8 dtype length, dtype str, u8 ndim,
+# ndim x u64 shape, then the raw C-order buffer.
+def _pack_array(arr):
+    arr = np.ascontiguousarray(arr)
+    dtype = arr.dtype.str.encode("ascii")
+    header = struct.pack(f"<B{len(dtype)}sB{arr.ndim}Q", len(dtype), dtype, arr.ndim, *arr.shape)
+    return msgpack.ExtType(_NDARRAY, header + arr.tobytes())
+
+
+def _unpack_array(data):
+    dtype_len = data[0]
+    dtype = data[1:1 + dtype_len].decode("ascii")
+    ndim = data[1 + dtype_len]
+    offset = 2 + dtype_len
+    shape = struct.unpack_from(f"<{ndim}Q", data, offset)
+    offset += 8 * ndim
+    return np.frombuffer(data, dtype=dtype, offset=offset).reshape(shape)
+
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        # Object arrays hold PyObject pointers, not values; send their items.
+        if obj.dtype.hasobject:
+            return obj.tolist()
+        return _pack_array(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Cannot serialize object of type {type(obj).__name__}")
+
+
+def _ext_hook(code, data):
+    if code == _NDARRAY:
+        return _unpack_array(data)
+    return msgpack.ExtType(code, data)
+
+
+def dumps(obj):
+    body = msgpack.packb(obj, default=_default, use_bin_type=True)
+    if len(body) >= COMPRESS_THRESHOLD:
+        return _ZSTD + _compressor.compress(body)
+    return _RAW + body
+
+
+def loads(data):
+    if isinstance(data, str):
+        data = data.encode("latin-1")
+    data = memoryview(data)
+    if data[:1] == _ZSTD:
+        body = _decompressor.decompress(data[1:])
+    else:
+        body = data[1:]
+    return msgpack.unpackb(body, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+
+
+register(
+    SERIALIZER_NAME,
+    dumps,
+    loads,
+    content_type=CONTENT_TYPE,
+    content_encoding="binary",
+)
@@ -0,0 +1,27 @@
+from pathlib import Path
+import json
+
+# skill_aliases.json has two sections:
+# - "synonyms": other spellings of the same skill (k8s, postgres, golang).
+#   They are rewritten in ticket text, in the employee embedding text and in
+#   the vocabulary; stored employee records keep the skills as uploaded.
+# - "related": tools that point at a broader skill (helm -> Kubernetes,
+#   S3 -> AWS). They only rewrite ticket text, to the first candidate that
+#   exists in the ingested data.
+ALIAS_FILE = Path(__file__).with_name("skill_aliases.json")
+
+with open(ALIAS_FILE) as f:
+    _aliases = json.load(f)
+SYNONYMS = _aliases["synonyms"]
+RELATED = _aliases["related"]
+_BY_LOWER = {alias.lower(): skill for alias, skill in SYNONYMS.items()}
+
+
+def canonical_skill(skill):
+    skill = skill.strip()
+    return _BY_LOWER.get(skill.lower(), skill)
+
+
+def canonical_terms(value):
+    """Skills of a comma-separated field with synonyms replaced, without duplicates."""
+    return list(dict.fromkeys(canonical_skill(s) for s in str(value or "").split(",") if s.strip()))
@@ -0,0 +1,71 @@
+from worker.utils.matcher import PhraseMatcher, variants
+from worker.utils.local_cache import read_through
+from worker.utils.redis_client import get_redis
+from worker.utils.vocabulary import VOCAB_PREFIX
+from worker.utils.skill_aliases import SYNONYMS, RELATED
+
+# Ticket-side index: every spelling of a known skill, its synonyms, and
+# related tools -> known skill. A synonym wins over a related entry for the
+# same alias (e.g. "postgres" -> PostgreSQL, else SQL).
+ALIASES_KEY = "skills:aliases"
+
+
+def compile_index(known_skills):
+    index = {}
+    for skill in known_skills:
+        for spelling in variants(skill):
+            index[spelling] = skill
+    for alias, skill in SYNONYMS.items():
+        if skill in known_skills:
+            for spelling in variants(alias):
+                index.setdefault(spelling, skill)
+    for alias, candidates in RELATED.items():
+        target = next((c for c in candidates if c in known_skills), None)
+        if target:
+            for spelling in variants(alias):
+                index.setdefault(spelling, target)
+    return index
+
+
+def known_skills(redis_client):
+    skills = set()
+    for key in redis_client.scan_iter(match=f"{VOCAB_PREFIX}*"):
+        for field in redis_client.hkeys(key):
+            if isinstance(field, bytes):
+                field = field.decode("utf-8")
+            kind, term = field.split(":", 1)
+            if kind in ("primary", "secondary"):
+                skills.add(term)
+    return skills
+
+
+def publish_index(redis_client):
+    index = compile_index(known_skills(redis_client))
+    pipe = redis_client.pipeline()
+    pipe.delete(ALIASES_KEY)
+    if index:
+        pipe.hset(ALIASES_KEY, mapping=index)
+    pipe.execute()
+    return len(index)
+
+
+def _load_matcher():
+    index = get_redis("vector").hgetall(ALIASES_KEY)
+    return PhraseMatcher(index)
+
+
+def skill_matcher():
+    return read_through("skill_index", "all", _load_matcher)
+
+
+def canonicalize(text):
+    """Replaces skill aliases in free text with the canonical skill name."""
+    text = " ".join(text.split())
+    parts = []
+    last = 0
+    for start, end, canonical in skill_matcher().find(text):
+        parts.append(text[last:start])
+        parts.append(canonical)
+        last = end
+    parts.append(text[last:])
+    return "".join(parts)
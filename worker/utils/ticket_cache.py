@@ -0,0 +1,49 @@
+from worker.utils.redis_client import get_redis
+from worker.utils.local_cache import generation
+from worker.utils.models import get_model
+from worker.utils.serializer import dumps, loads
+from worker.utils.skills import canonicalize
+from dotenv import load_dotenv
+import numpy as np
+import os
+
+load_dotenv()
+
+# Recent assignments per department, newest first, as packed
+# {query, embedding, assignment} entries in one capped list. The dataset
+# generation is part of the key, so an ingest starts every department over.
+TICKET_CACHE_ENABLED = os.getenv("TICKET_CACHE_ENABLED", "1") == "1"
+TICKET_CACHE_THRESHOLD = float(os.getenv("TICKET_CACHE_THRESHOLD", "0.95"))
+TICKET_CACHE_SIZE = int(os.getenv("TICKET_CACHE_SIZE", "100"))
+TICKET_CACHE_TTL = int(os.getenv("TICKET_CACHE_TTL_SECONDS", "900"))
+
+
+def entry_key(department):
+    return f"ticket_cache:{generation()}:{department}"
+
+
+def embed_ticket(query):
+    embedding = get_model().encode(canonicalize(query), show_progress_bar=False, normalize_embeddings=True)
+    return np.asarray(embedding, dtype=np.float32)
+
+
+def lookup(key, embedding, threshold=TICKET_CACHE_THRESHOLD):
+    """Assignment and similarity of the closest cached ticket, or None if
+    nothing cached is at least `threshold` similar."""
+    entries = [loads(raw) for raw in get_redis("cache", decode_responses=False).lrange(key, 0, -1)]
+    if not entries:
+        return None
+    similarities = np.stack([entry["embedding"] for entry in entries]) @ embedding
+    best = int(np.argmax(similarities))
+    if similarities[best] < threshold:
+        return None
+    return entries[best]["assignment"], float(similarities[best])
+
+
+def remember(key, query, embedding, assignment):
+    entry = dumps({"query": query, "embedding": np.asarray(embedding, dtype=np.float32), "assignment": assignment})
+    pipe = get_redis("cache", decode_responses=False).pipeline(transaction=False)
+    pipe.lpush(key, entry)
+    pipe.ltrim(key, 0, TICKET_CACHE_SIZE - 1)
+    pipe.expire(key, TICKET_CACHE_TTL)
+    pipe.execute()
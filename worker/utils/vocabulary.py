@@ -0,0 +1,154 @@
+from worker.utils.employee_schema import KEY_PREFIX, SCHEMA_VERSION
+from worker.utils.employee_index import ensure_index
+from worker.utils.redis_client import run_once
+from worker.utils.skill_aliases import canonical_terms
+from collections import Counter
+import uuid
+
+# Per-department vocabulary lives in one hash per department,
+# vocab:{department} -> {"primary:<skill>": n, "secondary:<skill>": n, "role:<role>": n},
+# so the query path reads a whole department with a single HGETALL.
+VOCAB_PREFIX = "vocab:"
+# Versioned like the index: a vocabulary counted from an older hash layout
+# is rebuilt once the hashes have been migrated.
+BUILT_MARKER = f"vocabulary:built:v{SCHEMA_VERSION}"
+# Rebuilds count into BUILD_PREFIX hashes first; the TTL cleans up after a
+# build that died before its swap.
+BUILD_PREFIX = "vocab_build:"
+BUILD_TTL = 3600
+REBUILD_BATCH = 1000
+KINDS = ("primary", "secondary", "role")
+VOCAB_FIELDS = ("department", "role", "primary_skills", "secondary_skills")
+
+# Applies signed deltas and drops terms whose count reaches zero in one step.
+_APPLY_DELTAS = """
+for i = 1, #KEYS do
+    local count = redis.call('HINCRBY', KEYS[i], ARGV[2 * i - 1], ARGV[2 * i])
+    if count <= 0 then
+        redis.call('HDEL', KEYS[i], ARGV[2 * i - 1])
+    end
+end
+return #KEYS
+"""
+
+
+def vocab_key(department):
+    return f"{VOCAB_PREFIX}{department}"
+
+
+def split_terms(value):
+    return [term.strip() for term in str(value or "").split(",") if term.strip()]
+
+
+def _decode(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _terms(row):
+    department, role, primary, secondary = (_decode(v) for v in row)
+    if not department:
+        return
+    # Skills are counted under their canonical name; the stored records keep
+    # the uploaded spelling, so both sides of a delta are canonicalized here.
+    for skill in canonical_terms(primary):
+        yield department, f"primary:{skill}"
+    for skill in canonical_terms(secondary):
+        yield department, f"secondary:{skill}"
+    if role:
+        yield department, f"role:{role.strip()}"
+
+
+def row_fields(meta):
+    return (meta.get("Department"), meta.get("Role/title"), meta.get("Primary skills"), meta.get("Secondary skills"))
+
+
+def _deltas(removed, added):
+    deltas = Counter()
+    for row in removed:
+        for department, field in _terms(row):
+            deltas[(department, field)] -= 1
+    for row in added:
+        for department, field in _terms(row):
+            deltas[(department, field)] += 1
+    return deltas
+
+
+def apply_changes(redis_client, removed, added):
+    """removed/added are (department, role, primary, secondary) tuples."""
+    deltas = _deltas(removed, added)
+
+    keys, args = [], []
+    for (department, field), delta in deltas.items():
+        if delta:
+            keys.append(vocab_key(department))
+            args.extend([field, delta])
+    if keys:
+        redis_client.eval(_APPLY_DELTAS, len(keys), *keys, *args)
+
+
+def stored_rows(redis_client, keys):
+    pipe = redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.hmget(key, *VOCAB_FIELDS)
+    return [row for row in pipe.execute() if row[0]]
+
+
+def rebuild(redis_client):
+    """Counts every stored employee into temporary hashes and swaps them in
+    with RENAME in one transaction, so readers see either the old or the new
+    vocabulary, never a half-built one."""
+    print("Rebuilding department vocabulary from stored employees")
+    counts = Counter()
+    batch = []
+    for key in redis_client.scan_iter(match=f"{KEY_PREFIX}*", count=REBUILD_BATCH):
+        batch.append(key)
+        if len(batch) >= REBUILD_BATCH:
+            counts.update(_deltas([], stored_rows(redis_client, batch)))
+            batch = []
+    if batch:
+        counts.update(_deltas([], stored_rows(redis_client, batch)))
+
+    departments = {}
+    for (department, field), count in counts.items():
+        departments.setdefault(department, {})[field] = count
+    build = f"{BUILD_PREFIX}{uuid.uuid4().hex}:"
+    pipe = redis_client.pipeline(transaction=False)
+    for department, fields in departments.items():
+        pipe.hset(f"{build}{department}", mapping=fields)
+        pipe.expire(f"{build}{department}", BUILD_TTL)
+    pipe.execute()
+
+    stale = [key for key in redis_client.scan_iter(match=f"{VOCAB_PREFIX}*")
+             if _decode(key)[len(VOCAB_PREFIX):] not in departments]
+    pipe = redis_client.pipeline()
+    if stale:
+        pipe.delete(*stale)
+    for department in departments:
+        pipe.rename(f"{build}{department}", vocab_key(department))
+    pipe.set(BUILT_MARKER, 1)
+    pipe.execute()
+
+
+def is_built(redis_client):
+    return bool(redis_client.exists(BUILT_MARKER))
+
+
+def ensure_built(redis_client):
+    """Builds the vocabulary once; concurrent callers wait for the process
+    holding the build lock instead of rebuilding alongside it."""
+    ensure_index()
+    if not is_built(redis_client):
+        run_once(redis_client, BUILT_MARKER, lambda: rebuild(redis_client))
+
+
+def read_vocabulary(redis_client, department):
+    ensure_built(redis_client)
+    counts = redis_client.hgetall(vocab_key(department))
+
+    vocabulary = {kind: [] for kind in KINDS}
+    for field, count in counts.items():
+        kind, term = _decode(field).split(":", 1)
+        vocabulary[kind].append((term, int(count)))
+    for kind in KINDS:
+        vocabulary[kind].sort(key=lambda item: (-item[1], item[0]))
+    return vocabulary
@@ -1,25 +1,76 @@
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 from dotenv import load_dotenv
+from worker.utils.serializer import SERIALIZER_NAME
 import os
 
 load_dotenv()
 
+# Tasks that mostly wait on LLM or SMTP round trips. When CELERY_IO_QUEUE is
+# set they are routed to that queue, which is meant to be served by a gevent
+# worker (many tickets in flight per process, no models loaded); everything
+# else stays on the prefork workers that hold the embedding model.
+IO_QUEUE = os.getenv("CELERY_IO_QUEUE", "")
+IO_TASKS = (
+    'worker.query_transformation.query_parser.query_parser',
+    'worker.query_transformation.generate_answer.generate_answer',
+    'worker.query_transformation.send_notification.send_notification',
+    'worker.query_transformation.failure_notification.failure_notification',
+    'worker.data_transformation.send_notification.send_notification',
+    'worker.data_transformation.failure_notification.failure_notification',
+)
+
 app = Celery('ticketmaster_worker', 
              broker=os.getenv('CELERY_BROKER_URL'),
              backend=os.getenv('CELERY_BACKEND_URL'))
 
 app.conf.update(
+    CELERY_TASK_SERIALIZER=SERIALIZER_NAME,
+    CELERY_RESULT_SERIALIZER=SERIALIZER_NAME,
+    CELERY_ACCEPT_CONTENT=[SERIALIZER_NAME, 'json'],
     CELERY_IMPORTS=(
         'worker.data_transformation.process_file',
         'worker.data_transformation.create_embeddings',
         'worker.data_transformation.store_embeddings',
+        'worker.data_transformation.stream_ingest',
+        'worker.data_transformation.shard_embeddings',
         'worker.data_transformation.send_notification',
         'worker.data_transformation.failure_notification',
         'worker.query_transformation.metadata_extractor',
         'worker.query_transformation.query_parser',
         'worker.query_transformation.retrieve_chunks',
         'worker.query_transformation.generate_answer',
+        'worker.query_transformation.assign_ticket',
+        'worker.query_transformation.route_ticket',
         'worker.query_transformation.send_notification',
         'worker.query_transformation.failure_notification',
-    )
-)
\ No newline at end of file
+    ),
+    CELERY_ROUTES={task: {'queue': IO_QUEUE} for task in IO_TASKS} if IO_QUEUE else {},
+)
+
+
+# A gevent worker runs -c greenlets in one process, all sharing its pools.
+@worker_init.connect
+def size_redis_pools(sender=None, **kwargs):
+    from worker.utils.redis_client import size_pools
+    size_pools(getattr(sender, "concurrency", None) or 0)
+
+
+# Torch weights are loaded once in the parent so prefork children share them
+# copy-on-write; the warm-up encode runs per child because torch thread pools
+# and onnxruntime sessions do not survive fork. The onnx backend is therefore
+# only loaded in the children, after the parent has run the onnx parity check
+# (once per deploy, see verify_parity).
+@worker_init.connect
+def load_models_before_fork(**kwargs):
+    from worker.utils.models import PRELOAD_MODELS, preload_models, verify_parity
+    if PRELOAD_MODELS:
+        verify_parity()
+        preload_models()
+
+
+@worker_process_init.connect
+def warm_up_models(**kwargs):
+    from worker.utils.models import PRELOAD_MODELS, warm_up
+    if PRELOAD_MODELS:
+        warm_up()